@@ -0,0 +1,55 @@
+from perf import timed
+
+
+class AIScheduler:
+    """
+    Keeps its own list of enemies and decides how often each one thinks.
+    Enemies near the player run their AI every frame, enemies at mid range
+    every few frames, and enemies beyond the wake radius sleep entirely
+    (no AI, no movement, no animation) until the player comes back.
+    """
+
+    def __init__(self, full_rate_radius, wake_radius, reduced_interval):
+        self.full_rate_radius_sq = full_rate_radius ** 2
+        self.wake_radius_sq = wake_radius ** 2
+        self.reduced_interval = reduced_interval
+        self.enemies = []
+        self.frame = 0
+
+        # per-frame counts, for tuning the radii
+        self.counts = {'active': 0, 'reduced': 0, 'sleeping': 0}
+
+    def add(self, enemy):
+        self.enemies.append(enemy)
+
+    @timed('enemy_ai')
+    def update(self, player):
+        self.frame += 1
+        if any(not enemy.alive() for enemy in self.enemies):
+            self.enemies = [enemy for enemy in self.enemies if enemy.alive()]
+
+        active = reduced = sleeping = 0
+        player_x, player_y = player.rect.center
+        for index, enemy in enumerate(self.enemies):
+            enemy_x, enemy_y = enemy.rect.center
+            distance_sq = (enemy_x - player_x) ** 2 + (enemy_y - player_y) ** 2
+
+            if distance_sq > self.wake_radius_sq:
+                if not enemy.sleeping:
+                    enemy.sleep()
+                sleeping += 1
+                continue
+
+            enemy.sleeping = False
+            if distance_sq > self.full_rate_radius_sq:
+                # spread mid-range enemies over the interval instead of bunching them
+                if (self.frame + index) % self.reduced_interval == 0:
+                    enemy.enemy_update(player)
+                reduced += 1
+            else:
+                enemy.enemy_update(player)
+                active += 1
+
+        self.counts['active'] = active
+        self.counts['reduced'] = reduced
+        self.counts['sleeping'] = sleeping
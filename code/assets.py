@@ -0,0 +1,170 @@
+import os
+import time
+import pygame
+from collections import OrderedDict
+from settings import weapon_data, TEXT_CACHE_BYTES
+from support import get_path, import_folder
+from perf import timings
+
+WEAPON_DIRECTIONS = ('up', 'down', 'left', 'right')
+
+
+class AssetRegistry:
+    """
+    Process-wide cache of loaded images and sounds.
+    Every caller asking for the same asset gets the same object back, so
+    treat the returned surfaces, frame lists and sounds as read-only.
+    """
+
+    def __init__(self):
+        self.fonts = {}
+        self.images = {}
+        self.folders = {}
+        self.sounds = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_held = 0
+        self.load_seconds = 0.0
+
+    def loaded(self, start_time):
+        elapsed = time.perf_counter() - start_time
+        self.load_seconds += elapsed
+        if timings.enabled:
+            timings.add('asset_load', elapsed)
+
+    def font(self, path, size):
+        """A Font for (path, size), opened once."""
+        key = (os.path.normpath(get_path(path)), size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        start_time = time.perf_counter()
+        font = pygame.font.Font(key[0], size)
+        self.loaded(start_time)
+        self.fonts[key] = font
+        return font
+
+    def image(self, path, alpha=True):
+        """A converted image, loaded from disk once. alpha=False drops per-pixel alpha for faster blits."""
+        key = (os.path.normpath(get_path(path)), alpha)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        start_time = time.perf_counter()
+        image = pygame.image.load(key[0])
+        image = image.convert_alpha() if alpha else image.convert()
+        self.loaded(start_time)
+        self.images[key] = image
+        self.bytes_held += surface_size(image)
+        return image
+
+    def folder(self, path):
+        """All frames of an animation folder, loaded once."""
+        key = os.path.normpath(get_path(path))
+        frames = self.folders.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+
+        self.misses += 1
+        start_time = time.perf_counter()
+        frames = import_folder(path)
+        self.loaded(start_time)
+        self.folders[key] = frames
+        self.bytes_held += sum(surface_size(frame) for frame in frames)
+        return frames
+
+    def sound(self, path, volume=None):
+        """A Sound for path at volume, loaded once per (path, volume)."""
+        key = (os.path.normpath(get_path(path)), volume)
+        sound = self.sounds.get(key)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        start_time = time.perf_counter()
+        sound = pygame.mixer.Sound(key[0])
+        self.loaded(start_time)
+        if volume is not None:
+            sound.set_volume(volume)
+        self.sounds[key] = sound
+        self.bytes_held += len(sound.get_raw())
+        return sound
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_held': self.bytes_held,
+            'load_ms': self.load_seconds * 1000,
+            'fonts': len(self.fonts),
+            'images': len(self.images),
+            'folders': len(self.folders),
+            'sounds': len(self.sounds),
+        }
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (font, text, color, antialias),
+    bounded by the bytes the surfaces hold. Returned surfaces are shared:
+    copy one before changing its alpha.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=False):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        self.bytes_held += surface_size(surface)
+        while self.bytes_held > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes_held -= surface_size(evicted)
+        return surface
+
+
+def weapon_image_path(weapon, direction):
+    return f'../graphics/weapons/{weapon}/{direction}.png'
+
+
+def preload_weapon_graphics():
+    """
+    Warm the image cache with every direction of every weapon plus its icon,
+    so attacking never decodes a PNG. Returns the load time per weapon in ms.
+    """
+    timings = {}
+    for weapon, data in weapon_data.items():
+        start_time = time.perf_counter()
+        for direction in WEAPON_DIRECTIONS:
+            assets.image(weapon_image_path(weapon, direction))
+        assets.image(data['graphic'])
+        timings[weapon] = (time.perf_counter() - start_time) * 1000
+    return timings
+
+
+def surface_size(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+assets = AssetRegistry()
+text_cache = TextCache(TEXT_CACHE_BYTES)
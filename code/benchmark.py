@@ -0,0 +1,201 @@
+"""
+Micro-benchmarks for hot paths that don't need a game window.
+
+    python benchmark.py pathfinding [--queries 10000] [--seed 0]
+    python benchmark.py backends [--queries 1000] [--field 200] [--seed 0]
+    python benchmark.py particles [--frames 200] [--seed 0]
+    python benchmark.py frames [--map default] [--frames 600] [--seed 0] [--script FILE] [--export FILE]
+
+'frames' plays a level headless (see headless.py) and reports per-frame
+percentiles of each phase; the final state it prints is the same for the
+same map, seed and script. --export writes every frame's timings to a
+.csv or .jsonl file.
+"""
+import argparse
+import json
+import random
+import time
+
+from map_compiler import load_map
+from pathfinding_utils import AStarSearch, PathGrid, build_grid_from_map
+from pathfinders import PATHFINDERS
+from particle_kernel import NumpyKernel, PythonKernel, numpy
+from particles import DriftParticles, ParticlePool
+
+SHIPPED_MAPS = ('default', 'test', 'island', 'island2')
+
+
+def walkable_cells(grid):
+    return [(x, y) for y in range(grid.height) for x in range(grid.width) if not grid.is_blocked(x, y)]
+
+
+def bench_pathfinding(queries, seed):
+    rng = random.Random(seed)
+    per_map = max(1, queries // len(SHIPPED_MAPS))
+    print(f'A* pathfinding: {per_map} random queries per map')
+    print(f'{"map":<10}{"size":>8}{"workload":>14}{"ms/query":>11}{"expanded":>10}{"cache hits":>12}')
+
+    for map_id in SHIPPED_MAPS:
+        with load_map(map_id) as compiled_map:
+            grid = build_grid_from_map(compiled_map)
+        cells = walkable_cells(grid)
+        random_pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(per_map)]
+        # enemies chasing a player: many starts, a handful of goals
+        goals = [rng.choice(cells) for _ in range(8)]
+        chase_pairs = [(rng.choice(cells), rng.choice(goals)) for _ in range(per_map)]
+
+        for workload, pairs, cache_size in (('uncached', random_pairs, 0),
+                                            ('random', random_pairs, 256),
+                                            ('shared goal', chase_pairs, 256)):
+            search = AStarSearch(grid, cache_size=cache_size)
+            start_time = time.perf_counter()
+            for start, goal in pairs:
+                search.find_path(start, goal)
+            elapsed = time.perf_counter() - start_time
+            hits = search.cache_hits + search.suffix_hits
+            print(f'{map_id:<10}{grid.width:>4}x{grid.height:<3}{workload:>14}'
+                  f'{elapsed / len(pairs) * 1000:>11.3f}{search.expansions / len(pairs):>10.1f}'
+                  f'{hits / len(pairs):>11.0%}')
+
+
+def open_field(size, density, rng):
+    """A large grass-field style map: open ground with scattered obstacles."""
+    grid = PathGrid(size, size)
+    for index in range(len(grid.cells)):
+        if rng.random() < density:
+            grid.cells[index] = 1
+    return grid
+
+
+def bench_backends(queries, field_size, seed):
+    rng = random.Random(seed)
+    grids = []
+    for map_id in ('default', 'test'):
+        with load_map(map_id) as compiled_map:
+            grids.append((map_id, build_grid_from_map(compiled_map)))
+    grids.append(('field', open_field(field_size, 0.1, rng)))
+
+    print(f'Pathfinding backends: {queries} uncached random queries per map')
+    print(f'{"map":<10}{"size":>9}{"backend":>9}{"build ms":>10}{"ms/query":>10}{"expanded":>10}{"length":>8}')
+    for map_id, grid in grids:
+        cells = walkable_cells(grid)
+        pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(queries)]
+        reference = None
+        for backend, factory in PATHFINDERS.items():
+            start_time = time.perf_counter()
+            search = AStarSearch(grid, cache_size=0) if backend == 'astar' else factory(grid)
+            build_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            lengths = [len(search.find_path(start, goal)) for start, goal in pairs]
+            elapsed = time.perf_counter() - start_time
+
+            # path length relative to plain A*, which is always shortest
+            total_length = sum(lengths)
+            reference = reference or total_length or 1
+            print(f'{map_id:<10}{grid.width:>4}x{grid.height:<4}{backend:>9}{build_time * 1000:>10.1f}'
+                  f'{elapsed / queries * 1000:>10.3f}{search.expansions / queries:>10.1f}'
+                  f'{total_length / reference:>8.3f}')
+
+
+def bench_particles(frames, seed):
+    rng = random.Random(seed)
+    kernels = [PythonKernel()] + ([NumpyKernel()] if numpy is not None else [])
+    if numpy is None:
+        print('NumPy not installed, timing the pure Python kernel only')
+    print(f'Particle kernels: ms per frame over {frames} frames')
+    print(f'{"kernel":<8}{"particles":>10}{"homing ms":>11}{"drift ms":>10}')
+
+    # an animation long enough that no particle finishes during the run
+    animation = [None] * (frames + 1)
+    for count in (100, 1000, 10000):
+        for kernel in kernels:
+            pool = ParticlePool(count, animation_speed=1, kernel=kernel)
+            for _ in range(count):
+                pool.spawn((rng.uniform(0, 4000), rng.uniform(0, 4000)), animation,
+                           target_pos=(rng.uniform(0, 4000), rng.uniform(0, 4000)),
+                           speed=1, max_lifetime=frames)
+            start_time = time.perf_counter()
+            for _ in range(frames):
+                pool.update(1)
+            homing = (time.perf_counter() - start_time) / frames
+
+            drift = DriftParticles(1280, 720, kernel=kernel)
+            drift.reset([(rng.randint(0, 1280), rng.randint(0, 720), rng.randint(-2, 2), rng.randint(-2, 2),
+                          1, (255, 0, 0)) for _ in range(count)])
+            start_time = time.perf_counter()
+            for _ in range(frames):
+                drift.update()
+            drifting = (time.perf_counter() - start_time) / frames
+
+            print(f'{kernel.name:<8}{count:>10}{homing * 1000:>11.3f}{drifting * 1000:>10.3f}')
+
+
+def bench_frames(map_id, frames, seed, script_path, export_path):
+    import headless
+    from perf import timings
+
+    headless.init_headless()
+    script = headless.DEMO_SCRIPT
+    if script_path:
+        # JSON list of [seconds, [pygame key names]]
+        with open(script_path) as file:
+            script = json.load(file)
+    if export_path:
+        timings.export_to(export_path)
+    try:
+        level = headless.run_level(map_id, frames, seed, script)
+    finally:
+        timings.close_export()
+
+    print(f'Frames: map {map_id}, {frames} frames, seed {seed}; update includes enemy_ai, collision and attack,')
+    print('enemy_ai includes enemy_update and path_search, draw includes custom_draw')
+    print(f'{"phase":<13}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}')
+    for phase in ('frame', 'update', 'enemy_ai', 'enemy_update', 'path_search', 'collision', 'attack', 'draw',
+                  'custom_draw'):
+        p50, p95, p99, worst = timings.percentiles(phase, (50, 95, 99, 100))
+        print(f'{phase:<13}{p50 * 1000:>9.3f}{p95 * 1000:>9.3f}{p99 * 1000:>9.3f}{worst * 1000:>9.3f}')
+
+    player = level.player
+    enemies = sum(enemy.alive() for enemy in level.ai_scheduler.enemies)
+    print(f'final player ({player.pos.x:.1f}, {player.pos.y:.1f}) health {player.health} '
+          f'exp {player.exp} enemies alive {enemies}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    pathfinding = subparsers.add_parser('pathfinding', help='random A* queries on the shipped maps')
+    pathfinding.add_argument('--queries', type=int, default=10000)
+    pathfinding.add_argument('--seed', type=int, default=0)
+
+    backends = subparsers.add_parser('backends', help='compare A*, JPS and HPA* on shipped and generated maps')
+    backends.add_argument('--queries', type=int, default=1000)
+    backends.add_argument('--field', type=int, default=200, help='side of the generated open field map')
+    backends.add_argument('--seed', type=int, default=0)
+
+    particles = subparsers.add_parser('particles', help='python vs numpy particle kernels at 100, 1k and 10k particles')
+    particles.add_argument('--frames', type=int, default=200)
+    particles.add_argument('--seed', type=int, default=0)
+
+    frames = subparsers.add_parser('frames', help='play a level headless and time each phase per frame')
+    frames.add_argument('--map', default='default', help='map id to load')
+    frames.add_argument('--frames', type=int, default=600)
+    frames.add_argument('--seed', type=int, default=0)
+    frames.add_argument('--script', help='input script, JSON list of [seconds, [key names]]')
+    frames.add_argument('--export', help='write per-frame timings to this .csv or .jsonl file')
+
+    args = parser.parse_args()
+    if args.benchmark == 'pathfinding':
+        bench_pathfinding(args.queries, args.seed)
+    elif args.benchmark == 'backends':
+        bench_backends(args.queries, args.field, args.seed)
+    elif args.benchmark == 'particles':
+        bench_particles(args.frames, args.seed)
+    elif args.benchmark == 'frames':
+        bench_frames(args.map, args.frames, args.seed, args.script, args.export)
+
+
+if __name__ == '__main__':
+    main()
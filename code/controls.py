@@ -0,0 +1,51 @@
+import pygame
+from sim_clock import sim_clock
+
+
+class KeyboardInput:
+    """The real keyboard."""
+
+    def get_pressed(self):
+        return pygame.key.get_pressed()
+
+
+class PressedKeys:
+    """Indexable like pygame.key.get_pressed(), for a fixed set of keys."""
+
+    def __init__(self, keys):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class ScriptedInput:
+    """
+    Replays a list of (seconds, keys) steps against the simulation clock,
+    starting over when it runs out, so a headless run presses the same keys
+    at the same simulated time on every machine.
+    """
+
+    def __init__(self, script):
+        self.steps = []
+        end = 0.0
+        for seconds, keys in script:
+            end += seconds
+            self.steps.append((end, PressedKeys(keys)))
+        self.length = end
+        self.start_time = sim_clock.time
+
+    def get_pressed(self):
+        elapsed = (sim_clock.time - self.start_time) % self.length
+        for end, keys in self.steps:
+            if elapsed < end:
+                return keys
+        return self.steps[-1][1]
+
+    @classmethod
+    def from_names(cls, script):
+        """Script with pygame key names ('right', 'space', 'left ctrl') instead of key codes."""
+        return cls([(seconds, [pygame.key.key_code(name) for name in names]) for seconds, names in script])
+
+
+keyboard = KeyboardInput()
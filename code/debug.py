@@ -1,4 +1,6 @@
 import pygame
+from settings import FPS, UI_FONT, PROFILER_FONT_SIZE
+from perf import timings
 
 pygame.init()
 
@@ -11,3 +13,64 @@ def debug(info, y=10, x=10):
     debug_rect = debug_surf.get_rect(topleft=(x, y))
     pygame.draw.rect(display_surface, 'Black', debug_rect)
     display_surface.blit(debug_surf, debug_rect)
+
+
+class ProfilerOverlay:
+    """
+    Frame-time graph over the profiler history, the most expensive scopes
+    with their calls per frame, and the level's sprite counts. Showing it
+    turns the timings on; hiding it turns them off again unless frames are
+    being exported.
+    """
+
+    def __init__(self, width=480, graph_height=80, graph_ms=1000 / 30):
+        self.visible = False
+        self.font = pygame.font.Font(UI_FONT, PROFILER_FONT_SIZE)
+        self.line_height = self.font.get_linesize()
+        self.width = width
+        self.graph_height = graph_height
+        # frame time at the top of the graph
+        self.graph_ms = graph_ms
+
+    def toggle(self):
+        self.visible = not self.visible
+        timings.enabled = self.visible or timings.export_file is not None
+
+    def draw(self, surface, fps):
+        p50, p95, p99 = (seconds * 1000 for seconds in timings.percentiles('frame'))
+        lines = [f'frame {p50:.1f} ms  p95 {p95:.1f}  p99 {p99:.1f}  {fps:.0f} fps']
+        scopes = sorted((scope for scope in timings.history if scope != 'frame'),
+                        key=lambda scope: timings.history[scope].mean(), reverse=True)
+        for scope in scopes[:8]:
+            lines.append(f'{scope:<13}{timings.history[scope].mean() * 1000:6.2f} ms'
+                         f'{timings.calls_per_frame(scope):7.1f}/f')
+        gauges = list(timings.gauges.items())
+        for index in range(0, len(gauges), 2):
+            lines.append('  '.join(f'{name} {value}' for name, value in gauges[index:index + 2]))
+
+        height = self.graph_height + 12 + len(lines) * self.line_height
+        left = surface.get_width() - self.width - 10
+        panel = pygame.Surface((self.width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        self.draw_graph(panel)
+        y = self.graph_height + 8
+        for line in lines:
+            panel.blit(self.font.render(line, False, 'white'), (6, y))
+            y += self.line_height
+        surface.blit(panel, (left, 10))
+
+    def draw_graph(self, panel):
+        history = timings.history.get('frame')
+        if history is None:
+            return
+        bottom = self.graph_height + 4
+        scale = self.graph_height / self.graph_ms
+        # one column per frame, newest on the right
+        x = self.width - 6 - len(history.samples)
+        for seconds in history.samples:
+            ms = seconds * 1000
+            color = (90, 220, 90) if ms <= 1000 / FPS else (240, 200, 60) if ms <= 1000 / 60 else (240, 70, 70)
+            pygame.draw.line(panel, color, (x, bottom), (x, bottom - min(ms * scale, self.graph_height)))
+            x += 1
+        budget = bottom - round(1000 / FPS * scale)
+        pygame.draw.line(panel, (200, 200, 200), (6, budget), (self.width - 6, budget))
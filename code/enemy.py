@@ -1,16 +1,21 @@
 import pygame
 
 from settings import monster_data
-from support import import_folder, get_path
+from assets import assets
 from entity import Entity
-from pathfinding_utils import astar, pos_to_grid, grid_to_pos
+from pathfinding_utils import pos_to_grid, grid_to_pos
+from sim_clock import sim_clock
+from perf import timed
 
 
 class Enemy(Entity):
-    def __init__(self, monster_name, pos, groups, obstacle_sprites, damage_player, trigger_death_particles, add_exp, trigger_exp_particles=None, pathfinding_grid=None, tile_size=None):
+    def __init__(self, monster_name, pos, groups, obstacle_sprites, damage_player, trigger_death_particles, add_exp, trigger_exp_particles=None, pathfinding_grid=None, tile_size=None, flow_field=None, pathfinder=None, on_death=None):
         super().__init__(groups, pos)
         # general setup
         self.sprite_type = 'enemy'
+        self.spawn_pos = pos
+        self.on_death = on_death
+        self.sleeping = False
 
         # graphics setup
         self.import_graphics(monster_name)
@@ -52,16 +57,18 @@ class Enemy(Entity):
         self.hit_time = None
         self.invisibility_duration = 300
 
-        # sounds
-        self.hit_sound = pygame.mixer.Sound(get_path('../audio/hit.wav'))
-        self.death_sound = pygame.mixer.Sound(get_path('../audio/death.wav'))
-        self.attack_sound = pygame.mixer.Sound(monster_data[self.monster_name]['attack_sound'])
-        self.hit_sound.set_volume(0.6)
-        self.death_sound.set_volume(0.6)
-        self.attack_sound.set_volume(0.3)
+        # sounds (shared between all enemies)
+        self.hit_sound = assets.sound('../audio/hit.wav', 0.6)
+        self.death_sound = assets.sound('../audio/death.wav', 0.6)
+        self.attack_sound = assets.sound(monster_data[self.monster_name]['attack_sound'], 0.3)
 
         # Pathfinding
         self.pathfinding_grid = pathfinding_grid
+        self.flow_field = flow_field
+        # any object with find_path(start, goal); plain A* on the grid by default
+        if pathfinder is None and pathfinding_grid is not None:
+            pathfinder = pathfinding_grid.search()
+        self.pathfinder = pathfinder
         self.tile_size = tile_size
         self.path = []
         self.last_path_time = 0
@@ -71,7 +78,7 @@ class Enemy(Entity):
     def import_graphics(self, name):
         self.animations = {'idle': [], 'move': [], 'attack': []}
         for animation in self.animations.keys():
-            self.animations[animation] = import_folder(
+            self.animations[animation] = assets.folder(
                 f'../graphics/monsters/{name}/' + animation)
 
     def get_player_distance_direction(self, player):
@@ -102,11 +109,23 @@ class Enemy(Entity):
             self.path = []
 
     def actions(self, player):
-        now = pygame.time.get_ticks()
+        now = sim_clock.get_ticks()
         if self.status == 'attack':
             self.attack_time = now
             self.damage_player(self.attack_damage, self.attack_type)
             self.attack_sound.play()
+        elif self.status == 'move' and self.flow_field is not None:
+            # Shared flow field: step to the neighbouring cell closer to the player
+            next_node = self.flow_field.next_step(pos_to_grid(self.rect.center, self.tile_size))
+            if next_node is not None:
+                vec_to_next = pygame.math.Vector2(grid_to_pos(next_node, self.tile_size)) - pygame.math.Vector2(self.rect.center)
+                if vec_to_next.length() > 0:
+                    self.direction = vec_to_next.normalize()
+                else:
+                    self.direction = pygame.math.Vector2()
+            else:
+                # Same cell as the player or out of the field's reach
+                self.direction = self.get_player_distance_direction(player)[1]
         elif self.status == 'move':
             recalc = False
             if not self.path or now - self.last_path_time > self.path_recalc_interval:
@@ -116,11 +135,11 @@ class Enemy(Entity):
                 current_player_grid = pos_to_grid(player.rect.center, self.tile_size)
                 if self._last_player_grid != current_player_grid:
                     recalc = True
-            if recalc and self.pathfinding_grid is not None:
+            if recalc and self.pathfinder is not None:
                 start = pos_to_grid(self.rect.center, self.tile_size)
                 goal = pos_to_grid(player.rect.center, self.tile_size)
                 self._last_player_grid = goal
-                path = astar(self.pathfinding_grid, start, goal)
+                path = self.pathfinder.find_path(start, goal)
                 if path and len(path) > 1:
                     self.path = path[1:]  # skip current position
                 else:
@@ -159,15 +178,16 @@ class Enemy(Entity):
         self.image = animation[int(self.frame_index)]
 
         if not self.vulnerable:
+            # frames are shared with every enemy of this kind, so flicker a copy
             alpha = self.wave_value()
-            self.image.set_alpha(alpha)
-        else:
-            self.image.set_alpha(255)
+            if alpha != 255:
+                self.image = self.image.copy()
+                self.image.set_alpha(alpha)
 
     def cooldown(self):
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         if not self.can_attack:
-            current_time = pygame.time.get_ticks()
+            current_time = sim_clock.get_ticks()
             if current_time - self.attack_time >= self.attack_cooldown:
                 self.can_attack = True
 
@@ -183,12 +203,14 @@ class Enemy(Entity):
                 self.health -= player.get_full_weapon_damage()
             else:  # magic
                 self.health -= player.get_full_magic_damage()
-            self.hit_time = pygame.time.get_ticks()
+            self.hit_time = sim_clock.get_ticks()
             self.vulnerable = False
 
     def check_death(self):
         if self.health <= 0:
             self.kill()
+            if self.on_death:
+                self.on_death(self)
             self.trigger_death_particles(self.rect.center, self.monster_name)
             self.add_exp(self.exp)
             if self.trigger_exp_particles and self.last_player_pos:
@@ -199,13 +221,23 @@ class Enemy(Entity):
         if not self.vulnerable:
             self.direction *= -self.resistance
 
+    def sleep(self):
+        # parked by the AI scheduler while far from the player
+        self.sleeping = True
+        self.status = 'idle'
+        self.direction = pygame.math.Vector2()
+        self.path = []
+
     def update(self, dt):
+        if self.sleeping:
+            return
         self.hit_reaction()
         self.move(self.speed, self.pos, dt)
         self.animate(dt)
         self.cooldown()
         self.check_death()
 
+    @timed('enemy_update')
     def enemy_update(self, player):
         self.get_status(player)
         self.actions(player)
@@ -0,0 +1,64 @@
+"""
+Running a level without a window or a keyboard, for benchmarks and CI.
+
+SDL gets its dummy video and audio drivers, the player follows a scripted
+input and the world's random source is seeded. With the fixed simulation
+step, the same map, seed and script play out the same on every machine.
+"""
+import os
+import time
+import pygame
+
+from settings import WIDTH, HEIGHT, SIMULATION_RATE
+from controls import ScriptedInput
+from perf import timings
+from sim_clock import sim_clock
+from support import rng
+
+# a walk around the spawn that swings the weapon and casts now and then
+DEMO_SCRIPT = [
+    (1.0, ['right']),
+    (0.5, ['space']),
+    (1.0, ['down']),
+    (1.0, ['left']),
+    (0.5, ['left ctrl']),
+    (1.0, ['up']),
+    (0.5, ['e']),
+    (0.5, []),
+]
+
+
+def init_headless():
+    """Start pygame on the dummy drivers with a display surface to draw on."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    return pygame.display.set_mode((WIDTH, HEIGHT))
+
+
+def run_level(map_id, frames, seed=0, script=DEMO_SCRIPT):
+    """
+    Build map_id and play frames simulation steps, drawing after each one,
+    with the phase timings of every frame recorded. Returns the level.
+    """
+    from level import Level
+
+    rng.seed(seed)
+    sim_clock.time = 0.0
+    level = Level(map_id)
+    level.player.input_source = ScriptedInput.from_names(script)
+
+    step = 1 / SIMULATION_RATE
+    timings.reset(history=frames)
+    timings.enabled = True
+    try:
+        for _ in range(frames):
+            start_time = time.perf_counter()
+            level.update(step)
+            level.draw()
+            timings.add('frame', time.perf_counter() - start_time)
+            timings.gauges.update(level.sprite_counts())
+            timings.end_frame()
+    finally:
+        timings.enabled = False
+    return level
@@ -1,48 +1,66 @@
 import pygame
-import os
-from settings import TILESIZE, WIDTH, HEIGHT
+import heapq
+from settings import TILESIZE, CAMERA_CELL_SIZE, STATIC_CHUNK_RENDERING, STATIC_CHUNK_SIZE, FLOW_FIELD_RADIUS, PATHFINDING_BACKEND
+from settings import AI_FULL_RATE_RADIUS, AI_WAKE_RADIUS, AI_REDUCED_TICK_INTERVAL, MAP_TRANSITIONS
+from settings import WORLD_STREAMING, WORLD_CHUNK_TILES, WORLD_LOAD_MARGIN, WORLD_UNLOAD_MARGIN
 from tile import Tile
 from player import Player
-from support import get_path, import_csv_layout, import_folder
-from random import choice, randint
+from assets import assets
+from map_compiler import load_map, PLAYER_CODE
+from support import rng
 from weapon import Weapon
 from ui import UI
 from enemy import Enemy
 from particles import AnimationPlayer
 from magic import MagicPlayer
 from upgrade import Upgrade
+from spatial_hash import SpatialGroup
+from pathfinding_utils import build_grid, build_grid_from_map, pos_to_grid, FlowField
+from pathfinders import create_pathfinder
+from ai_scheduler import AIScheduler
+from static_layers import StaticSpriteLayer, StaticChunkLayer
+from world_streaming import WorldStreamer
+from world_state import WorldState, GRASS, ENEMY
+from sim_clock import sim_clock
+from perf import timed
 
 
 class Level:
     def get_savable_state(self):
-        # Collect defeated enemies and destroyed grass by their initial positions
-        defeated_enemies = []
-        destroyed_grass = []
-        for sprite in self.attackable_sprites:
-            if hasattr(sprite, 'sprite_type'):
-                if sprite.sprite_type == 'enemy' and not sprite.alive():
-                    defeated_enemies.append({'x': sprite.rect.x, 'y': sprite.rect.y})
-                if sprite.sprite_type == 'grass' and not sprite.alive():
-                    destroyed_grass.append({'x': sprite.rect.x, 'y': sprite.rect.y})
-        return {
+        # what was removed on every visited map, by the tiles it came from
+        state = {
             'player': self.player.to_dict(),
-            'defeated_enemies': defeated_enemies,
-            'destroyed_grass': destroyed_grass
+            'map_id': self.map_id,
         }
-    def __init__(self, map_id, player=None, loaded_data=None, player_spawn_pos=None, on_transition=None):
+        state.update(self.world_state.to_dict())
+        return state
+
+    def __init__(self, map_id, player=None, loaded_data=None, player_spawn_pos=None, on_transition=None, compiled_map=None,
+                 world_state=None):
         # general setup
         self.display_surface = pygame.display.get_surface()
         self.game_paused = False
+        self.map_id = map_id
+
+        # grass and enemies already removed, shared by all levels of a game
+        if world_state is None:
+            world_state = WorldState.from_dict(loaded_data) if loaded_data else WorldState()
+        self.world_state = world_state
 
         # sprite group setup
         self.visible_sprites = YSortCameraGroup()
-        self.obstacle_sprites = pygame.sprite.Group()
+        # obstacles are indexed by tile so collisions only test nearby cells
+        self.obstacle_sprites = SpatialGroup(TILESIZE)
 
         # attack sprites
         self.current_attack = None
         self.attack_sprites = pygame.sprite.Group()
         self.attackable_sprites = pygame.sprite.Group()
 
+        # enemy AI level of detail
+        self.ai_scheduler = AIScheduler(
+            AI_FULL_RATE_RADIUS, AI_WAKE_RADIUS, AI_REDUCED_TICK_INTERVAL)
+
         # player setup
 
         self.player = player
@@ -54,7 +72,8 @@ class Level:
         self._last_transition_tile = None  # For debounce
 
         # sprite setup
-        self.create_map(map_id, loaded_data)
+        self.create_map(map_id, loaded_data, compiled_map)
+        self.visible_sprites.static_layer.prepare()
 
         # user interface
         self.ui = UI()
@@ -68,151 +87,142 @@ class Level:
         # Use sparkle as placeholder if exp_orb graphics are missing
         self.animation_player.create_exp_particles(enemy_pos, player_pos, self.visible_sprites, amount=5, exp_amount=exp_amount)
 
-    def create_map(self, map_id, loaded_data=None):
-        # Define transition point mapping here (could be loaded from a file or hardcoded for now)
-        # Example: { '9000': {'target_map_id': 'village', 'target_spawn': (5*TILESIZE, 10*TILESIZE)} }
-        TRANSITION_CODE_MAP = {
-            # From main map to test map (place 9000 in main map)
-            '9000': {'target_map_id': 'test', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
-            # From test map back to main map (place 9001 in test map)
-            '9001': {'target_map_id': 'default', 'target_spawn': (27*TILESIZE, 6*TILESIZE)},
-            # From test map to island (place 9002 in test map)
-            '9002': {'target_map_id': 'island', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
-            # From island back to test map (place 9003 in island map)
-            '9003': {'target_map_id': 'test', 'target_spawn': (8*TILESIZE, 5*TILESIZE)},
-            # From island to new island2 (place 9004 in island2 map)
-            '9004': {'target_map_id': 'island2', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
-        }
-        # Map file naming convention: map_<map_id>_<layer>.csv
-        def map_file(layer):
-            return f"../data/map/map_{map_id}_{layer}.csv"
-
-        # Fallback to default if not found
-        def file_or_default(path, default):
-            return path if os.path.exists(path) else default
-
-        layouts = {
-            'boundary': import_csv_layout(file_or_default(map_file('FloorBlocks'), '../data/map/map_FloorBlocks.csv')),
-            'grass': import_csv_layout(file_or_default(map_file('Grass'), '../data/map/map_Grass.csv')),
-            'object': import_csv_layout(file_or_default(map_file('Objects'), '../data/map/map_Objects.csv')),
-            'entities': import_csv_layout(file_or_default(map_file('Entities'), '../data/map/map_Entities.csv')),
-        }
+    def create_map(self, map_id, loaded_data=None, compiled_map=None):
+        if compiled_map is None:
+            compiled_map = load_map(map_id)
+        self.compiled_map = compiled_map
+        map_width = compiled_map.width * TILESIZE
+        map_height = compiled_map.height * TILESIZE
 
         # Set default spawn to center of map if not specified
         if self._player_spawn_pos is None:
-            map_width = len(layouts['boundary'][0]) * TILESIZE
-            map_height = len(layouts['boundary']) * TILESIZE
             self._player_spawn_pos = (map_width // 2, map_height // 2)
 
-        graphics = {
-            'grass': import_folder('../graphics/grass'),
-            'objects': import_folder('../graphics/objects'),
+        self.tile_graphics = {
+            'grass': assets.folder('../graphics/grass'),
+            'objects': assets.folder('../graphics/objects'),
         }
 
-        # Build pathfinding grid after all obstacles are placed
-        from pathfinding_utils import build_grid
-        self.pathfinding_grid = None
-
-        for style, layout in layouts.items():
-            for row_idx, row in enumerate(layout):
-                for col_idx, col in enumerate(row):
-                    if col != '-1':
-                        x = col_idx * TILESIZE
-                        y = row_idx * TILESIZE
-
-                        if style == 'boundary':
-                            Tile((x, y),
-                                 [self.obstacle_sprites],
-                                 'invisible')
-
-                        if style == 'grass':
-                            destroyed = False
-                            if loaded_data and 'destroyed_grass' in loaded_data:
-                                for g in loaded_data['destroyed_grass']:
-                                    if g['x'] == x and g['y'] == y:
-                                        destroyed = True
-                                        break
-                            if not destroyed:
-                                random_grass_image = choice(graphics['grass'])
-                                Tile((x, y),
-                                     [self.visible_sprites,
-                                         self.obstacle_sprites,  self.attackable_sprites],
-                                     'grass',
-                                     random_grass_image)
-
-                        if style == 'object':
-                            surf = graphics['objects'][int(col)]
-                            Tile((x, y),
-                                 [self.visible_sprites, self.obstacle_sprites],
-                                 'object',
-                                 surf)
-
-        # Now build the pathfinding grid
-        self.pathfinding_grid = build_grid(WIDTH, HEIGHT, TILESIZE, self.obstacle_sprites)
-
-        # Place entities (player and enemies) after grid is built
-        entities_layout = layouts['entities']
-        for row_idx, row in enumerate(entities_layout):
-            for col_idx, col in enumerate(row):
-                if col != '-1':
+        self.world_streamer = None
+        if WORLD_STREAMING:
+            # tiles and enemies are built chunk by chunk around the camera, so
+            # the pathfinding grid comes from the map data instead of sprites
+            cut_grass = self.world_state.removed_cells(GRASS, map_id)
+            self.pathfinding_grid = build_grid_from_map(compiled_map, cut_grass)
+        else:
+            for layer in ('boundary', 'grass', 'object'):
+                for col_idx, row_idx, code in compiled_map.cells(layer):
                     x = col_idx * TILESIZE
                     y = row_idx * TILESIZE
-                    # Transition point check
-                    if col in TRANSITION_CODE_MAP:
-                        self.transition_points[(x, y)] = TRANSITION_CODE_MAP[col]
-                        # Optionally, add a visible marker or invisible tile for debugging
-                        Tile((x, y), [self.visible_sprites], 'invisible')
-                        continue
-                    if col == '394':
-                        if self.player is None:
-                            # Create new player if not provided
-                            spawn_pos = (x, y)
-                            if self._player_spawn_pos is not None:
-                                spawn_pos = self._player_spawn_pos
-                            self.player = Player(
-                                spawn_pos,
-                                [self.visible_sprites],
-                                self.obstacle_sprites,
-                                self.create_attack,
-                                self.destroy_attack,
-                                self.create_magic)
-                            if loaded_data and 'player' in loaded_data:
-                                self.player.from_dict(loaded_data['player'])
-                        else:
-                            # Move provided player to spawn
-                            if self._player_spawn_pos is not None:
-                                self.player.pos.x, self.player.pos.y = self._player_spawn_pos
-                                self.player.rect.center = self._player_spawn_pos
-                                self.player.hitbox.center = self._player_spawn_pos  # Ensure hitbox is synced
-                            self.player.obstacle_sprites = self.obstacle_sprites
-                            self.player.create_attack = self.create_attack
-                            self.player.destroy_attack = self.destroy_attack
-                            self.player.create_magic = self.create_magic
-                            self.visible_sprites.add(self.player)
-                    else:
-                        defeated = False
-                        if loaded_data and 'defeated_enemies' in loaded_data:
-                            for e in loaded_data['defeated_enemies']:
-                                if e['x'] == x and e['y'] == y:
-                                    defeated = True
-                                    break
-                        if not defeated:
-                            if col == '390':
-                                monster_name = 'bamboo'
-                            elif col == '391':
-                                monster_name = 'spirit'
-                            elif col == '392':
-                                monster_name = 'raccoon'
-                            else:
-                                monster_name = 'squid'
-
-                            Enemy(
-                                monster_name,
-                                (x, y),
-                                [self.visible_sprites, self.attackable_sprites],
-                                self.obstacle_sprites, self.damage_player, self.trigger_death_particles,
-                                self.add_exp, lambda enemy_pos, player_pos, exp_amount=0, self=self: self.trigger_exp_particles(enemy_pos, player_pos, exp_amount),
-                                pathfinding_grid=self.pathfinding_grid, tile_size=TILESIZE)
+                    if layer != GRASS or not self.world_state.is_removed(GRASS, map_id, (x, y)):
+                        self.create_tile(layer, x, y, code)
+            # Now build the pathfinding grid over the whole map, not just the screen
+            self.pathfinding_grid = build_grid(map_width, map_height, TILESIZE, self.obstacle_sprites)
+
+        # either one distance map from the player's tile shared by every chasing
+        # enemy, or a per-enemy search backend built over the whole map up front
+        self.flow_field = None
+        self.pathfinder = None
+        if PATHFINDING_BACKEND == 'flow_field':
+            self.flow_field = FlowField(self.pathfinding_grid, FLOW_FIELD_RADIUS)
+        else:
+            self.pathfinder = create_pathfinder(PATHFINDING_BACKEND, self.pathfinding_grid)
+
+        # Transition points, with an invisible marker tile for debugging
+        for col_idx, row_idx, code in compiled_map.transitions:
+            if code in MAP_TRANSITIONS:
+                x = col_idx * TILESIZE
+                y = row_idx * TILESIZE
+                self.transition_points[(x, y)] = MAP_TRANSITIONS[code]
+                Tile((x, y), [self.visible_sprites], 'invisible')
+
+        # Place entities (player and enemies) after grid is built
+        for col_idx, row_idx, code in compiled_map.spawns:
+            x = col_idx * TILESIZE
+            y = row_idx * TILESIZE
+            if code == PLAYER_CODE:
+                if self.player is None:
+                    # Create new player if not provided
+                    spawn_pos = (x, y)
+                    if self._player_spawn_pos is not None:
+                        spawn_pos = self._player_spawn_pos
+                    self.player = Player(
+                        spawn_pos,
+                        [self.visible_sprites],
+                        self.obstacle_sprites,
+                        self.create_attack,
+                        self.destroy_attack,
+                        self.create_magic)
+                    if loaded_data and 'player' in loaded_data:
+                        self.player.from_dict(loaded_data['player'])
+                else:
+                    # Move provided player to spawn
+                    self.attach_player(self.player, self._player_spawn_pos)
+            elif not WORLD_STREAMING and not self.world_state.is_removed(ENEMY, map_id, (x, y)):
+                self.create_enemy(code, x, y)
+
+        if WORLD_STREAMING:
+            self.world_streamer = WorldStreamer(
+                compiled_map, TILESIZE, WORLD_CHUNK_TILES, self.display_surface.get_size(),
+                WORLD_LOAD_MARGIN, WORLD_UNLOAD_MARGIN, self.create_tile, self.create_enemy,
+                lambda kind, pos: self.world_state.is_removed(kind, map_id, pos))
+            self.world_streamer.update(self.player.rect.center)
+
+    def attach_player(self, player, spawn_pos=None):
+        """Bring a player over from another level, placing it at spawn_pos if given."""
+        self.player = player
+        if spawn_pos is not None:
+            self._player_spawn_pos = spawn_pos
+            player.pos.x, player.pos.y = spawn_pos
+            player.rect.center = spawn_pos
+            player.hitbox.center = spawn_pos  # Ensure hitbox is synced
+        player.obstacle_sprites = self.obstacle_sprites
+        player.create_attack = self.create_attack
+        player.destroy_attack = self.destroy_attack
+        player.create_magic = self.create_magic
+        # leave the previous level's groups, which may be kept alive in the level cache
+        player.kill()
+        self.visible_sprites.add(player)
+        self._last_transition_tile = None
+        # have the chunks around the spawn ready for the first frame
+        if self.world_streamer is not None:
+            self.world_streamer.update(player.rect.center)
+
+    def create_tile(self, layer, x, y, code):
+        if layer == 'boundary':
+            return Tile((x, y), [self.obstacle_sprites], 'invisible')
+        if layer == 'grass':
+            random_grass_image = rng.choice(self.tile_graphics['grass'])
+            return Tile((x, y),
+                        [self.visible_sprites, self.obstacle_sprites, self.attackable_sprites],
+                        'grass',
+                        random_grass_image)
+        return Tile((x, y),
+                    [self.visible_sprites, self.obstacle_sprites],
+                    'object',
+                    self.tile_graphics['objects'][code])
+
+    def create_enemy(self, code, x, y):
+        if code == 390:
+            monster_name = 'bamboo'
+        elif code == 391:
+            monster_name = 'spirit'
+        elif code == 392:
+            monster_name = 'raccoon'
+        else:
+            monster_name = 'squid'
+
+        enemy = Enemy(
+            monster_name,
+            (x, y),
+            [self.visible_sprites, self.attackable_sprites],
+            self.obstacle_sprites, self.damage_player, self.trigger_death_particles,
+            self.add_exp, lambda enemy_pos, player_pos, exp_amount=0, self=self: self.trigger_exp_particles(enemy_pos, player_pos, exp_amount),
+            pathfinding_grid=self.pathfinding_grid, tile_size=TILESIZE,
+            flow_field=self.flow_field, pathfinder=self.pathfinder,
+            on_death=lambda enemy: self.world_state.remove(ENEMY, self.map_id, enemy.spawn_pos))
+        self.ai_scheduler.add(enemy)
+        return enemy
 
     def check_transition(self):
         # Check if player is on a transition point (debounced)
@@ -235,8 +245,7 @@ class Level:
 
     def create_magic(self, style, strength, cost):
         if style == 'heal':
-            self.magic_player.heal(self.player, strength, cost, [
-                                   self.visible_sprites])
+            self.magic_player.heal(self.player, strength, cost)
 
         if style == 'flame':
             self.magic_player.flame(
@@ -247,6 +256,7 @@ class Level:
             self.current_attack.kill()
         self.current_attack = None
 
+    @timed('attack')
     def player_attack_logic(self):
         if self.attack_sprites:
             for attack_sprite in self.attack_sprites:
@@ -257,25 +267,35 @@ class Level:
                         if target_sprite.sprite_type == 'grass':
                             pos = target_sprite.rect.center
                             offset = pygame.math.Vector2(0, 75)
-                            for leaf in range(randint(3, 6)):
-                                self.animation_player.create_grass_particles(
-                                    pos - offset, [self.visible_sprites])
+                            for leaf in range(rng.randint(3, 6)):
+                                self.animation_player.create_grass_particles(pos - offset)
                             target_sprite.kill()
+                            self.world_state.remove(GRASS, self.map_id, target_sprite.rect.topleft)
+                            self.clear_pathfinding_cell(target_sprite)
                         else:
                             target_sprite.get_damage(
                                 self.player, attack_sprite.sprite_type)
 
+    def clear_pathfinding_cell(self, obstacle):
+        # open the grid cell of a removed obstacle unless another one still sits there
+        cell = pos_to_grid(obstacle.rect.topleft, TILESIZE)
+        if not self.pathfinding_grid.in_bounds(*cell):
+            return
+        cell_rect = pygame.Rect(cell[0] * TILESIZE, cell[1] * TILESIZE, TILESIZE, TILESIZE)
+        for sprite in self.obstacle_sprites.query(cell_rect):
+            if pos_to_grid(sprite.rect.topleft, TILESIZE) == cell:
+                return
+        self.pathfinding_grid.set_walkable(cell)
+
     def damage_player(self, amount, attack_type):
         if self.player.vulnerable:
             self.player.health -= amount
             self.player.vulnerable = False
-            self.player.hurt_time = pygame.time.get_ticks()
-            self.animation_player.create_particles(
-                attack_type, self.player.rect.center, [self.visible_sprites])
+            self.player.hurt_time = sim_clock.get_ticks()
+            self.animation_player.create_particles(attack_type, self.player.rect.center)
 
     def trigger_death_particles(self, pos, particle_type):
-        self.animation_player.create_particles(
-            particle_type, pos, self.visible_sprites)
+        self.animation_player.create_particles(particle_type, pos)
 
     def add_exp(self, amount):
         self.player.exp += amount
@@ -291,19 +311,45 @@ class Level:
                 save_game(self.get_savable_state())
                 print("Game saved!")
 
-    def run(self, dt):
-        # update and draw the game
-        self.visible_sprites.custom_draw(self.player)
+    @timed('update')
+    def update(self, dt):
+        """Advance the world by one fixed simulation step of dt seconds."""
+        # before the pause check too, so a paused world is drawn where it stopped
+        self.visible_sprites.begin_step()
+        if self.game_paused:
+            return
+        sim_clock.advance(dt)
+        if self.world_streamer is not None:
+            self.world_streamer.update(self.player.rect.center)
+        self.visible_sprites.update(dt)
+        self.animation_player.pool.update(dt)
+        if self.flow_field is not None:
+            self.flow_field.update(pos_to_grid(self.player.rect.center, TILESIZE))
+        self.ai_scheduler.update(self.player)
+        self.player_attack_logic()
+        # Check for map transition
+        self.check_transition()
+
+    def sprite_counts(self):
+        """Sizes of the sprite groups and pools, and the HUD's redraw rate, for the profiler."""
+        return {
+            'sprites': len(self.visible_sprites),
+            'moving': len(self.visible_sprites.dynamic_sprites),
+            'obstacles': len(self.obstacle_sprites),
+            'enemies_awake': self.ai_scheduler.counts['active'] + self.ai_scheduler.counts['reduced'],
+            'particles': len(self.animation_player.pool.live),
+            'hud_rebuilds/s': self.ui.rebuilds_per_second,
+        }
+
+    @timed('draw')
+    def draw(self, alpha=1.0):
+        """Draw the world alpha of the way from the previous simulation step to the current one."""
+        self.visible_sprites.custom_draw(self.player, alpha)
+        self.animation_player.pool.draw(self.display_surface, self.visible_sprites.offset)
         self.ui.display(self.player)
 
         if self.game_paused:  # display upgrade menu
             self.upgrade.display()
-        else:  # run the game
-            self.visible_sprites.update(dt)
-            self.visible_sprites.enemy_update(self.player)
-            self.player_attack_logic()
-            # Check for map transition
-            self.check_transition()
 
 
 class YSortCameraGroup(pygame.sprite.Group):
@@ -315,27 +361,69 @@ class YSortCameraGroup(pygame.sprite.Group):
         self.half_height = self.display_surface.get_size()[1] // 2
         self.offset = pygame.math.Vector2()
 
+        # static tiles are drawn culled and pre-sorted by their own layer,
+        # moving sprites are sorted on their own and merged in
+        if STATIC_CHUNK_RENDERING:
+            self.static_layer = StaticChunkLayer(STATIC_CHUNK_SIZE)
+        else:
+            self.static_layer = StaticSpriteLayer(CAMERA_CELL_SIZE)
+        # moving sprite -> its rect center before the current simulation step
+        self.dynamic_sprites = {}
+
         # floor setup
-        floor_path = get_path('../graphics/tilemap/ground.png')
-        self.floor_surf = pygame.image.load(floor_path).convert()
+        self.floor_surf = assets.image('../graphics/tilemap/ground.png', alpha=False)
         self.floor_rect = self.floor_surf.get_rect(topleft=(0, 0))
 
-    def custom_draw(self, player):
-        # getting the offset
-        self.offset.x = player.rect.centerx - self.half_width
-        self.offset.y = player.rect.centery - self.half_height
+    def begin_step(self):
+        for sprite in self.dynamic_sprites:
+            self.dynamic_sprites[sprite] = sprite.rect.center
+
+    def snap(self, sprite):
+        """Draw a sprite that was moved outside a step where it is, without sliding it there."""
+        if sprite in self.dynamic_sprites:
+            self.dynamic_sprites[sprite] = None
+
+    def draw_shift(self, sprite, alpha):
+        """How far from its rect a moving sprite is drawn, for rendering between two steps."""
+        previous = self.dynamic_sprites.get(sprite)
+        if previous is None or alpha >= 1:
+            return (0, 0)
+        x, y = sprite.rect.center
+        return (round((previous[0] - x) * (1 - alpha)), round((previous[1] - y) * (1 - alpha)))
+
+    @timed('custom_draw')
+    def custom_draw(self, player, alpha=1.0):
+        # getting the offset, following the player where it is drawn
+        shift_x, shift_y = self.draw_shift(player, alpha)
+        self.offset.x = player.rect.centerx + shift_x - self.half_width
+        self.offset.y = player.rect.centery + shift_y - self.half_height
 
         # drawing the floor
         floor_offset_pos = self.floor_rect.topleft - self.offset
         self.display_surface.blit(self.floor_surf, floor_offset_pos)
 
-        for sprite in sorted(self.sprites(), key=lambda sprite: sprite.rect.centery):
-            offset_rect = sprite.rect.topleft - self.offset
-            self.display_surface.blit(sprite.image, offset_rect)
-
-    def enemy_update(self, player):
-        enemy_sprites = [sprite for sprite in self.sprites() if hasattr(
-            sprite, 'sprite_type') and sprite.sprite_type == 'enemy']
-
-        for enemy in enemy_sprites:
-            enemy.enemy_update(player)
+        view_rect = pygame.Rect(
+            (int(self.offset.x), int(self.offset.y)), self.display_surface.get_size())
+        static_items = self.static_layer.items_in_view(view_rect)
+        moving_items = []
+        for sprite in self.dynamic_sprites:
+            if sprite.rect.colliderect(view_rect):
+                shift_x, shift_y = self.draw_shift(sprite, alpha)
+                moving_items.append((sprite.rect.centery + shift_y, sprite.image,
+                                     (sprite.rect.left + shift_x, sprite.rect.top + shift_y)))
+        moving_items.sort(key=lambda item: item[0])
+
+        for _, image, topleft in heapq.merge(static_items, moving_items, key=lambda item: item[0]):
+            self.display_surface.blit(image, topleft - self.offset)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if isinstance(sprite, Tile):
+            self.static_layer.add(sprite)
+        else:
+            self.dynamic_sprites[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.static_layer.remove(sprite)
+        self.dynamic_sprites.pop(sprite, None)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from map_compiler import load_map
+
+
+class LevelCache:
+    """
+    Keeps the most recently visited levels alive, so going back to a map
+    resumes it with its killed enemies and cut grass instead of rebuilding it.
+
+    Maps the player is likely to enter next can be compiled ahead of time on
+    a background thread. Only the map data is prepared there: sprites and
+    surfaces are still created on the main thread when the level is built.
+    """
+
+    def __init__(self, max_levels):
+        self.max_levels = max_levels
+        self.levels = OrderedDict()
+        self.preloads = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='map-preload')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, map_id):
+        level = self.levels.get(map_id)
+        if level is None:
+            self.misses += 1
+            return None
+        self.levels.move_to_end(map_id)
+        self.hits += 1
+        return level
+
+    def put(self, map_id, level):
+        self.levels[map_id] = level
+        self.levels.move_to_end(map_id)
+        while len(self.levels) > self.max_levels:
+            _, evicted = self.levels.popitem(last=False)
+            evicted.compiled_map.close()
+
+    def clear(self):
+        for level in self.levels.values():
+            level.compiled_map.close()
+        self.levels.clear()
+
+    def preload(self, map_id):
+        """Start compiling map_id in the background unless it is cached or queued."""
+        if map_id not in self.levels and map_id not in self.preloads:
+            self.preloads[map_id] = self.executor.submit(load_map, map_id)
+            # at most as many unconsumed maps as cached levels, dropping the oldest
+            while len(self.preloads) > self.max_levels:
+                self.discard_preload(next(iter(self.preloads)))
+
+    def preload_near(self, level, radius):
+        """
+        Preload the maps behind the transition points within radius of the
+        player. Finished or failed preloads of maps that are no longer near,
+        or that are cached as levels by now, are dropped, so walking back
+        to a transition tries a failed map again.
+        """
+        player_x, player_y = level.player.rect.center
+        radius_sq = radius ** 2
+        # target maps in the order of their transition points
+        near = dict.fromkeys(data['target_map_id'] for (x, y), data in level.transition_points.items()
+                             if (x - player_x) ** 2 + (y - player_y) ** 2 <= radius_sq)
+
+        for map_id, future in list(self.preloads.items()):
+            if future.done() and (map_id not in near or map_id in self.levels):
+                self.discard_preload(map_id)
+        for map_id in near:
+            self.preload(map_id)
+
+    def discard_preload(self, map_id):
+        """Forget the preload of map_id, closing its map once it is compiled."""
+        future = self.preloads.pop(map_id)
+        if not future.cancel():
+            future.add_done_callback(close_preloaded_map)
+
+    def preloaded_map(self, map_id):
+        """The compiled map prepared for map_id, waiting for it if still in progress."""
+        future = self.preloads.pop(map_id, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except (OSError, ValueError):
+            # the level loads the map itself and reports the error there
+            return None
+
+
+def close_preloaded_map(future):
+    if future.exception() is None:
+        future.result().close()
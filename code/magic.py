@@ -1,29 +1,27 @@
 import pygame
 from settings import magic_data, TILESIZE
-from random import randint
+from support import rng
+from assets import assets
 
 
 class MagicPlayer:
     def __init__(self, animation_player):
         self.animation_player = animation_player
         self.sounds = {
-            'heal': pygame.mixer.Sound(magic_data['heal']['spell_sound']),
-            'flame': pygame.mixer.Sound(magic_data['flame']['spell_sound'])
+            'heal': assets.sound(magic_data['heal']['spell_sound'], 0.5),
+            'flame': assets.sound(magic_data['flame']['spell_sound'], 0.4)
         }
-        self.sounds['heal'].set_volume(0.5)
-        self.sounds['flame'].set_volume(0.4)
 
-    def heal(self, player, strength, cost, groups):
+    def heal(self, player, strength, cost):
         if player.energy >= cost:
             self.sounds['heal'].play()
             player.health += strength
             player.energy -= cost
             if player.health >= player.stats['health']:
                 player.health = player.stats['health']
-            self.animation_player.create_particles('aura',
-                                                   player.rect.center, groups)
+            self.animation_player.create_particles('aura', player.rect.center)
             self.animation_player.create_particles('heal',
-                                                   player.rect.center + pygame.math.Vector2(0, -20), groups)
+                                                   player.rect.center + pygame.math.Vector2(0, -20))
 
     def flame(self, player, cost, groups):
         if player.energy >= cost:
@@ -44,16 +42,16 @@ class MagicPlayer:
                 if direction.x:  # horizontal
                     offset_x = (direction.x * i) * TILESIZE
                     x = player.rect.centerx + offset_x + \
-                        randint(-TILESIZE//3, TILESIZE//3)
+                        rng.randint(-TILESIZE//3, TILESIZE//3)
                     y = player.rect.centery + \
-                        randint(-TILESIZE//3, TILESIZE//3)
-                    self.animation_player.create_particles(
+                        rng.randint(-TILESIZE//3, TILESIZE//3)
+                    self.animation_player.create_attack_particles(
                         'flame', (x, y), groups)
                 else:  # vertical
                     offset_y = (direction.y * i) * TILESIZE
                     x = player.rect.centerx + \
-                        randint(-TILESIZE//3, TILESIZE//3)
+                        rng.randint(-TILESIZE//3, TILESIZE//3)
                     y = player.rect.centery + offset_y + \
-                        randint(-TILESIZE//3, TILESIZE//3)
-                    self.animation_player.create_particles(
+                        rng.randint(-TILESIZE//3, TILESIZE//3)
+                    self.animation_player.create_attack_particles(
                         'flame', (x, y), groups)
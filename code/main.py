@@ -5,9 +5,17 @@ import sys
 import time
 import math
 from random import randint
-from settings import WIDTH, HEIGHT, FPS, WATER_COLOR
+from settings import WIDTH, HEIGHT, FPS, WATER_COLOR, LEVEL_CACHE_SIZE, LEVEL_PRELOAD_RADIUS, SAVE_AUTOSAVE_INTERVAL
+from settings import SIMULATION_RATE, MAX_FRAME_TIME, PROFILER_EXPORT_PATH
 from level import Level
+from level_cache import LevelCache
+from world_state import WorldState
 from support import get_path
+from assets import preload_weapon_graphics
+from particles import DriftParticles
+from debug import ProfilerOverlay
+from perf import timings
+from save_manager import save_game, load_game, save_exists, autosave, record_event, reset_journal
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
@@ -47,6 +55,17 @@ class Game:
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         self.clock = pygame.time.Clock()
 
+        # frame profiler, F3 shows it
+        self.profiler_overlay = ProfilerOverlay()
+        if PROFILER_EXPORT_PATH:
+            timings.export_to(PROFILER_EXPORT_PATH)
+            timings.enabled = True
+
+        # Warm the weapon image cache so attacks never load from disk
+        weapon_load_times = preload_weapon_graphics()
+        print(f"Weapon graphics preloaded in {sum(weapon_load_times.values()):.1f} ms ("
+              + ", ".join(f"{weapon} {ms:.1f}" for weapon, ms in weapon_load_times.items()) + ")")
+
         # Game states
         self.game_state = 'start'  # 'start', 'game', 'death'
 
@@ -85,46 +104,60 @@ class Game:
             print("Warning: Could not load background music")
 
         # Particle animation data
-        self.death_particles = []
+        self.death_particles = DriftParticles(WIDTH, HEIGHT)
         self._init_death_particles()
 
         # Menu state
         self.selected_menu_option = 0  # 0 = Start, 1 = Quit
 
+        # Map system
+        self.current_map_id = 'default'  # can be changed for other maps
+        self.player = None
+        # recently visited levels, and maps compiled ahead of transitions
+        self.level_cache = LevelCache(LEVEL_CACHE_SIZE)
+
+        # Check for save file
+        self.show_save_dialog = False
+        self.save_dialog_result = None
+        if save_exists():
+            self.show_save_dialog = True
+            self.save_dialog_result = None
+
+        # New game; replaced if the player continues a saved one
+        self.start_level()
+
+    def start_level(self, loaded_data=None):
+        """Build the first level of a new or loaded game, forgetting cached levels."""
+        self.level_cache.clear()
+        reset_journal()
+        self.last_autosave = time.time()
+        if loaded_data:
+            self.world_state = WorldState.from_dict(loaded_data)
+            self.current_map_id = loaded_data.get('map_id', 'default')
+        else:
+            self.world_state = WorldState()
+            self.current_map_id = 'default'
+        self.world_state.on_remove = self.record_removal
+        self.level = Level(self.current_map_id, player=None, loaded_data=loaded_data, on_transition=self.handle_transition,
+                           world_state=self.world_state)
+        self.player = self.level.player
+
+    def record_removal(self, kind, map_id, pos):
+        record_event({'type': 'remove', 'kind': kind, 'map_id': map_id, 'x': int(pos[0]), 'y': int(pos[1])})
+
     def _init_death_particles(self):
         """Initialize death screen particles with random properties"""
-        self.death_particles = []
-        for _ in range(PARTICLE_COUNT_DEATH):
-            particle = {
-                'x': randint(0, WIDTH),
-                'y': randint(0, HEIGHT),
-                'size': randint(1, 4),
-                'speed_x': randint(-2, 2),
-                'speed_y': randint(-2, 2),
-                'color': (randint(100, 255), 0, 0)
-            }
-            self.death_particles.append(particle)
+        self.death_particles.reset([
+            (randint(0, WIDTH), randint(0, HEIGHT),
+             randint(-2, 2), randint(-2, 2),
+             randint(1, 4), (randint(100, 255), 0, 0))
+            for _ in range(PARTICLE_COUNT_DEATH)
+        ])
 
     def _update_and_draw_death_particles(self):
         """Update and draw animated death particles"""
-        for particle in self.death_particles:
-            # Update position
-            particle['x'] += particle['speed_x']
-            particle['y'] += particle['speed_y']
-
-            # Wrap around screen edges
-            if particle['x'] < 0:
-                particle['x'] = WIDTH
-            elif particle['x'] > WIDTH:
-                particle['x'] = 0
-            if particle['y'] < 0:
-                particle['y'] = HEIGHT
-            elif particle['y'] > HEIGHT:
-                particle['y'] = 0
-
-            # Draw particle
-            pygame.draw.circle(self.screen, particle['color'],
-                             (int(particle['x']), int(particle['y'])), particle['size'])
+        self.death_particles.update()
+        self.death_particles.draw(self.screen)
 
     def _render_highlighted_text(self, text, font, color, highlight_color, center_pos, selected=False):
         """Render text with optional highlight effect"""
@@ -147,30 +180,6 @@ class Game:
         text_rect = rendered_text.get_rect(center=center_pos)
         self.screen.blit(rendered_text, text_rect)
 
-        # Map system
-        self.current_map_id = 'default'  # can be changed for other maps
-        self.player = None
-
-        # Check for save file
-        save_path = 'savegame.json'
-        loaded_data = None
-        self.show_save_dialog = False
-        self.save_dialog_result = None
-        if os.path.exists(save_path):
-            self.show_save_dialog = True
-            self.save_dialog_result = None
-
-        # Create player and level (but only if not in start state)
-        if loaded_data and 'player' in loaded_data:
-            # If loading, player will be created by Level and then extracted
-            self.level = Level(self.current_map_id, player=None, loaded_data=loaded_data, on_transition=self.handle_transition)
-            self.player = self.level.player
-        else:
-            # New game
-            self.player = None  # Will be created by Level
-            self.level = Level(self.current_map_id, player=self.player, loaded_data=None, on_transition=self.handle_transition)
-            self.player = self.level.player
-
     def show_start_screen(self):
         # Background
         self.screen.fill(START_BG_COLOR)
@@ -251,7 +260,7 @@ class Game:
             for alpha in range(0, 256, speed):
                 fade_surface.set_alpha(alpha)
                 self.screen.fill((0, 0, 0))
-                self.level.run(0)  # draw current frame
+                self.level.draw()  # draw current frame
                 self.screen.blit(fade_surface, (0, 0))
                 pygame.display.update()
                 clock.tick(FPS // 2)
@@ -259,7 +268,7 @@ class Game:
             for alpha in range(255, -1, -speed):
                 fade_surface.set_alpha(alpha)
                 self.screen.fill((0, 0, 0))
-                self.level.run(0)  # draw new frame
+                self.level.draw()  # draw new frame
                 self.screen.blit(fade_surface, (0, 0))
                 pygame.display.update()
                 clock.tick(FPS // 2)
@@ -267,25 +276,37 @@ class Game:
     def handle_transition(self, target_map_id, target_spawn):
         # Fade out
         self.fade(fade_in=False)
-        # Switch map
+        # Switch map, keeping the one we leave in the cache
+        self.level.destroy_attack()
+        self.level_cache.put(self.current_map_id, self.level)
         self.current_map_id = target_map_id
-        self.level = Level(
-            self.current_map_id,
-            player=self.player,
-            loaded_data=None,
-            player_spawn_pos=target_spawn,
-            on_transition=self.handle_transition
-        )
+        level = self.level_cache.get(target_map_id)
+        if level is not None:
+            level.attach_player(self.player, target_spawn)
+        else:
+            level = Level(
+                self.current_map_id,
+                player=self.player,
+                loaded_data=None,
+                player_spawn_pos=target_spawn,
+                on_transition=self.handle_transition,
+                compiled_map=self.level_cache.preloaded_map(target_map_id),
+                world_state=self.world_state
+            )
+        self.level = level
+        record_event({'type': 'map', 'map_id': target_map_id, 'player': self.player.to_dict()})
         # Fade in
         self.fade(fade_in=True)
 
     def run(self):
         import pygame
-        from save_manager import save_game, load_game
-        last_time = time.time()
+        step = 1 / SIMULATION_RATE
+        accumulator = 0.0
+        last_time = time.perf_counter()
         while True:
-            dt = time.time() - last_time
-            last_time = time.time()
+            now = time.perf_counter()
+            frame_time = min(now - last_time, MAX_FRAME_TIME)
+            last_time = now
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -327,6 +348,7 @@ class Game:
                                 spawn_pos = self.level._player_spawn_pos if self.level._player_spawn_pos else (100, 100)
                                 self.player.pos = pygame.math.Vector2(spawn_pos)
                                 self.player.rect.center = spawn_pos
+                                self.level.visible_sprites.snap(self.player)
                         elif event.key == pygame.K_ESCAPE:
                             pygame.quit()
                             sys.exit()
@@ -342,6 +364,8 @@ class Game:
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_m:
                             self.level.toggle_menu()
+                        if event.key == pygame.K_F3:
+                            self.profiler_overlay.toggle()
                         # Save game when paused and P is pressed
                         if event.key == pygame.K_p and getattr(self.level, 'game_paused', False):
                             save_game(self.level.get_savable_state())
@@ -394,18 +418,34 @@ class Game:
                 pygame.display.update()
                 if self.save_dialog_result:
                     if self.save_dialog_result == 'c':
-                        loaded_data = load_game('savegame.json')
-                        self.level = Level(self.current_map_id, player=None, loaded_data=loaded_data, on_transition=self.handle_transition)
-                        self.player = self.level.player
+                        self.start_level(load_game())
                     elif self.save_dialog_result == 'n':
-                        self.level = Level(self.current_map_id, player=None, loaded_data=None, on_transition=self.handle_transition)
-                        self.player = self.level.player
+                        self.start_level()
                     self.show_save_dialog = False
                 self.clock.tick(FPS)
                 continue
 
+            # simulate in fixed steps for the time this frame covers, then draw between the last two
+            frame_start = time.perf_counter()
+            accumulator += frame_time
+            while accumulator >= step:
+                self.level.update(step)
+                accumulator -= step
             self.screen.fill(WATER_COLOR)
-            self.level.run(dt)
+            self.level.draw(accumulator / step)
+            self.level_cache.preload_near(self.level, LEVEL_PRELOAD_RADIUS)
+
+            if timings.enabled:
+                timings.add('frame', time.perf_counter() - frame_start)
+                timings.gauges.update(self.level.sprite_counts())
+                timings.end_frame()
+            if self.profiler_overlay.visible:
+                self.profiler_overlay.draw(self.screen, self.clock.get_fps())
+
+            # periodic autosave, mostly just a line in the journal
+            if self.player.health > 0 and time.time() - self.last_autosave >= SAVE_AUTOSAVE_INTERVAL:
+                autosave(self.level)
+                self.last_autosave = time.time()
 
             # Check for player death
             if self.player and self.player.health <= 0 and self.game_state != 'death':
@@ -0,0 +1,203 @@
+"""
+Compiles a map's layers, from its Tiled .tmx file or its CSV exports, into
+one binary file that loads without parsing.
+
+File layout (native byte order, the cache is local to the machine):
+
+    header     magic, format version, width, height, layer/transition/spawn counts
+    source key 20-byte SHA-1 of the source files' paths, mtimes and sizes
+    layers     per layer: 16-byte name and byte offset of its int16 cells
+    markers    (col, row, code) int16 triples: transitions first, then spawns
+    cells      int16 arrays of width * height cells, row-major, -1 for empty
+
+Compiled files are cached in MAP_CACHE_DIR and memory-mapped on load.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from settings import MAP_CACHE_DIR, MAP_TMX_DIR
+from support import get_path, import_csv_layout, map_layer_path
+from tmx_loader import load_tmx
+
+MAGIC = b'PZMP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('=4sHHHHHH20s')
+LAYER_ENTRY = struct.Struct('=16sI')
+MARKER = struct.Struct('=hhh')
+EMPTY = -1
+
+# entity layer codes
+PLAYER_CODE = 394
+TRANSITION_CODE_MIN = 9000
+
+# compiled layer name -> CSV layer name; optional layers are never borrowed from the default map
+LAYER_SOURCES = {
+    'boundary': 'FloorBlocks',
+    'grass': 'Grass',
+    'object': 'Objects',
+    'entities': 'Entities',
+}
+OPTIONAL_LAYER_SOURCES = {
+    'floor': 'Floor',
+    'details': 'Details',
+}
+
+
+class CompiledMap:
+    """
+    A compiled map file, memory-mapped. Layers are read-only int16 memoryviews.
+    close() unmaps the file; a with block does it on exit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.layers = {}
+        self.view = None
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.read_index()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def read_index(self):
+        (magic, version, self.width, self.height,
+         layer_count, transition_count, spawn_count, self.source_key) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{self.path} is not a version {FORMAT_VERSION} compiled map')
+
+        self.view = memoryview(self.buffer)
+        cell_bytes = self.width * self.height * 2
+        position = HEADER.size
+        for _ in range(layer_count):
+            name, offset = LAYER_ENTRY.unpack_from(self.buffer, position)
+            position += LAYER_ENTRY.size
+            self.layers[name.rstrip(b'\0').decode()] = self.view[offset:offset + cell_bytes].cast('h')
+
+        markers = [MARKER.unpack_from(self.buffer, position + index * MARKER.size)
+                   for index in range(transition_count + spawn_count)]
+        self.transitions = markers[:transition_count]
+        self.spawns = markers[transition_count:]
+
+    def close(self):
+        """Release the layer views and unmap the file. Closing twice is fine."""
+        for layer in self.layers.values():
+            layer.release()
+        self.layers = {}
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def cells(self, layer):
+        """(col, row, value) of every non-empty cell in layer, row by row."""
+        width = self.width
+        for index, value in enumerate(self.layers.get(layer, ())):
+            if value != EMPTY:
+                yield index % width, index // width, value
+
+
+def map_sources(map_id):
+    """Compiled layer name -> CSV path for map_id, or {'tmx': path} for a Tiled map."""
+    tmx_path = f'{MAP_TMX_DIR}/{map_id}.tmx'
+    if os.path.exists(get_path(tmx_path)):
+        return {'tmx': tmx_path}
+
+    sources = {name: map_layer_path(map_id, layer) for name, layer in LAYER_SOURCES.items()}
+    for name, layer in OPTIONAL_LAYER_SOURCES.items():
+        path = map_layer_path(map_id, layer, fallback=False)
+        if path is not None and os.path.exists(get_path(path)):
+            sources[name] = path
+    return sources
+
+
+def source_key(paths):
+    digest = hashlib.sha1(str(FORMAT_VERSION).encode())
+    for path in sorted(paths):
+        stat = os.stat(get_path(path))
+        digest.update(f'{os.path.normpath(path)}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+    return digest.digest()
+
+
+def compile_layers(layers, key):
+    """
+    Pack {name: rows of ints} into the compiled map format. Every layer must
+    have the size of the 'boundary' layer.
+    """
+    height = len(layers['boundary'])
+    width = len(layers['boundary'][0]) if height else 0
+    for name, rows in layers.items():
+        if len(rows) != height or any(len(row) != width for row in rows):
+            raise ValueError(f'layer {name!r} is not {width}x{height}')
+
+    transitions, spawns = [], []
+    for row_index, row in enumerate(layers.get('entities', ())):
+        for col_index, code in enumerate(row):
+            if code == EMPTY:
+                continue
+            marker = MARKER.pack(col_index, row_index, code)
+            (transitions if code >= TRANSITION_CODE_MIN else spawns).append(marker)
+
+    offset = HEADER.size + LAYER_ENTRY.size * len(layers) + MARKER.size * (len(transitions) + len(spawns))
+    offset += offset % 2  # keep the int16 arrays aligned
+    entries, cells = [], []
+    for name, rows in layers.items():
+        entries.append(LAYER_ENTRY.pack(name.encode(), offset))
+        cells.append(array('h', [code for row in rows for code in row]).tobytes())
+        offset += width * height * 2
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, width, height, len(layers), len(transitions), len(spawns), key)
+    head = header + b''.join(entries) + b''.join(transitions) + b''.join(spawns)
+    return head + b'\0' * (len(head) % 2) + b''.join(cells)
+
+
+def compile_map(map_id, sources=None):
+    sources = sources or map_sources(map_id)
+    if 'tmx' in sources:
+        layers = load_tmx(sources['tmx']).game_layers()
+    else:
+        layers = {name: [[int(code) for code in row] for row in import_csv_layout(path)]
+                  for name, path in sources.items()}
+    return compile_layers(layers, source_key(sources.values()))
+
+
+def cache_path(map_id):
+    return os.path.join(get_path(MAP_CACHE_DIR), f'{map_id}.pzmap')
+
+
+def load_map(map_id):
+    """
+    The compiled form of map_id, recompiled first when the cached file is
+    missing or older than its sources.
+    """
+    sources = map_sources(map_id)
+    key = source_key(sources.values())
+    path = cache_path(map_id)
+    if os.path.exists(path):
+        try:
+            compiled = CompiledMap(path)
+        except (ValueError, struct.error):
+            compiled = None
+        if compiled is not None:
+            if compiled.source_key == key:
+                return compiled
+            compiled.close()
+
+    data = compile_map(map_id, sources)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
+    return CompiledMap(path)
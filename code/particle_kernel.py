@@ -0,0 +1,113 @@
+"""
+Batched particle math shared by the in-world particle pool and the menu
+screens. Arrays come from kernel.zeros(); with NumPy they are ndarrays and
+every step is a handful of whole-array operations, without it they are
+plain lists walked in a single loop.
+"""
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# homing particles disappear once they are this close to their target
+ARRIVE_RADIUS = 16
+
+
+class NumpyKernel:
+    name = 'numpy'
+
+    def zeros(self, size):
+        return numpy.zeros(size)
+
+    def to_list(self, array):
+        return array.tolist()
+
+    def advance(self, pool, slots, dt):
+        """
+        Animate, home and age the pool particles in slots.
+        Returns the slots whose particle has finished.
+        """
+        slots = numpy.asarray(slots)
+        frame = pool.frame[slots] + pool.animation_speed * dt
+        pool.frame[slots] = frame
+        finished = frame >= pool.frame_count[slots]
+
+        speed = pool.speed[slots]
+        homing = speed > 0
+        if homing.any():
+            moving = slots[homing]
+            dx = pool.target_x[moving] - pool.x[moving]
+            dy = pool.target_y[moving] - pool.y[moving]
+            distance = numpy.hypot(dx, dy)
+            step = numpy.minimum(speed[homing] * dt, distance) / numpy.where(distance > 0, distance, 1)
+            pool.x[moving] += dx * step
+            pool.y[moving] += dy * step
+            lifetime = pool.lifetime[moving] + dt
+            pool.lifetime[moving] = lifetime
+            finished[homing] |= (distance < ARRIVE_RADIUS) | (lifetime > pool.max_lifetime[moving])
+        return slots[finished].tolist()
+
+    def drift(self, x, y, speed_x, speed_y, width, height):
+        """Move every particle by its speed and wrap it around the screen edges."""
+        x += speed_x
+        y += speed_y
+        x[x < 0] = width
+        x[x > width] = 0
+        y[y < 0] = height
+        y[y > height] = 0
+
+
+class PythonKernel:
+    name = 'python'
+
+    def zeros(self, size):
+        return [0.0] * size
+
+    def to_list(self, array):
+        return array
+
+    def advance(self, pool, slots, dt):
+        x, y, frame, frame_count = pool.x, pool.y, pool.frame, pool.frame_count
+        speed, lifetime = pool.speed, pool.lifetime
+        frame_step = pool.animation_speed * dt
+        finished = []
+        for slot in slots:
+            frame[slot] += frame_step
+            done = frame[slot] >= frame_count[slot]
+
+            if speed[slot]:
+                dx = pool.target_x[slot] - x[slot]
+                dy = pool.target_y[slot] - y[slot]
+                distance = math.hypot(dx, dy)
+                if distance > 0:
+                    step = min(speed[slot] * dt, distance) / distance
+                    x[slot] += dx * step
+                    y[slot] += dy * step
+                lifetime[slot] += dt
+                done = done or distance < ARRIVE_RADIUS or lifetime[slot] > pool.max_lifetime[slot]
+
+            if done:
+                finished.append(slot)
+        return finished
+
+    def drift(self, x, y, speed_x, speed_y, width, height):
+        for index in range(len(x)):
+            x[index] += speed_x[index]
+            y[index] += speed_y[index]
+            if x[index] < 0:
+                x[index] = width
+            elif x[index] > width:
+                x[index] = 0
+            if y[index] < 0:
+                y[index] = height
+            elif y[index] > height:
+                y[index] = 0
+
+
+def create_kernel(use_numpy=True):
+    return NumpyKernel() if use_numpy and numpy is not None else PythonKernel()
+
+
+kernel = create_kernel()
@@ -1,16 +1,23 @@
 import pygame
-from support import get_path, import_folder
-from random import choice
+from settings import UI_FONT, PARTICLE_POOL_SIZE
+from assets import assets, text_cache
+from particle_kernel import kernel
+from support import rng
 
 
 class AnimationPlayer:
-    def create_grass_particles(self, pos, groups):
-        grass_animation_frames = choice(self.frames['leaf'])
-        ParticleEffect(pos, grass_animation_frames, groups)
+    def create_grass_particles(self, pos):
+        grass_animation_frames = rng.choice(self.frames['leaf'])
+        self.pool.spawn(pos, grass_animation_frames)
+
+    def create_particles(self, animation_type, pos):
+        # purely visual, so it goes to the pool instead of the sprite groups
+        self.pool.spawn(pos, self.frames[animation_type])
+
+    def create_attack_particles(self, animation_type, pos, groups):
+        # attack particles have to collide, so they stay sprites
+        ParticleEffect(pos, self.frames[animation_type], groups)
 
-    def create_particles(self, animation_type, pos, groups):
-        animation_frames = self.frames[animation_type]
-        ParticleEffect(pos, animation_frames, groups)
     def reflect_images(self, frames):
         new_frames = []
         for frame in frames:
@@ -25,48 +32,48 @@ class AnimationPlayer:
         FloatingText(text, pos, groups, color, font_size, duration, rise_distance)
 
     def __init__(self):
+        self.pool = ParticlePool(PARTICLE_POOL_SIZE)
         self.frames = {
             # magic
-            'flame': import_folder('../graphics/particles/flame/frames'),
-            'aura': import_folder('../graphics/particles/aura'),
-            'heal': import_folder('../graphics/particles/heal/frames'),
+            'flame': assets.folder('../graphics/particles/flame/frames'),
+            'aura': assets.folder('../graphics/particles/aura'),
+            'heal': assets.folder('../graphics/particles/heal/frames'),
 
             # attacks
-            'claw': import_folder('../graphics/particles/claw'),
-            'slash': import_folder('../graphics/particles/slash'),
-            'sparkle': import_folder('../graphics/particles/sparkle'),
-            'leaf_attack': import_folder('../graphics/particles/leaf_attack'),
-            'thunder': import_folder('../graphics/particles/thunder'),
+            'claw': assets.folder('../graphics/particles/claw'),
+            'slash': assets.folder('../graphics/particles/slash'),
+            'sparkle': assets.folder('../graphics/particles/sparkle'),
+            'leaf_attack': assets.folder('../graphics/particles/leaf_attack'),
+            'thunder': assets.folder('../graphics/particles/thunder'),
 
             # monster deaths
-            'squid': import_folder('../graphics/particles/smoke_orange'),
-            'raccoon': import_folder('../graphics/particles/raccoon'),
-            'spirit': import_folder('../graphics/particles/nova'),
-            'bamboo': import_folder('../graphics/particles/bamboo'),
+            'squid': assets.folder('../graphics/particles/smoke_orange'),
+            'raccoon': assets.folder('../graphics/particles/raccoon'),
+            'spirit': assets.folder('../graphics/particles/nova'),
+            'bamboo': assets.folder('../graphics/particles/bamboo'),
 
             # leafs
             'leaf': (
-                import_folder('../graphics/particles/leaf1'),
-                import_folder('../graphics/particles/leaf2'),
-                import_folder('../graphics/particles/leaf3'),
-                import_folder('../graphics/particles/leaf4'),
-                import_folder('../graphics/particles/leaf5'),
-                import_folder('../graphics/particles/leaf6'),
-                self.reflect_images(import_folder('../graphics/particles/leaf1')),
-                self.reflect_images(import_folder('../graphics/particles/leaf2')),
-                self.reflect_images(import_folder('../graphics/particles/leaf3')),
-                self.reflect_images(import_folder('../graphics/particles/leaf4')),
-                self.reflect_images(import_folder('../graphics/particles/leaf5')),
-                self.reflect_images(import_folder('../graphics/particles/leaf6')),
+                assets.folder('../graphics/particles/leaf1'),
+                assets.folder('../graphics/particles/leaf2'),
+                assets.folder('../graphics/particles/leaf3'),
+                assets.folder('../graphics/particles/leaf4'),
+                assets.folder('../graphics/particles/leaf5'),
+                assets.folder('../graphics/particles/leaf6'),
+                self.reflect_images(assets.folder('../graphics/particles/leaf1')),
+                self.reflect_images(assets.folder('../graphics/particles/leaf2')),
+                self.reflect_images(assets.folder('../graphics/particles/leaf3')),
+                self.reflect_images(assets.folder('../graphics/particles/leaf4')),
+                self.reflect_images(assets.folder('../graphics/particles/leaf5')),
+                self.reflect_images(assets.folder('../graphics/particles/leaf6')),
             ),
             # exp orb
-            'exp_orb': import_folder('../graphics/particles/exp_orb'),
+            'exp_orb': assets.folder('../graphics/particles/exp_orb'),
         }
     def create_exp_particles(self, pos, target_pos, groups, amount=5, speed=250, exp_amount=None):
         """
         Spawn several exp orb particles at pos, moving towards target_pos.
         """
-        from random import uniform
         # Fallback to sparkle if exp_orb frames are missing or empty
         orb_frames = self.frames.get('exp_orb', [])
         if not orb_frames:
@@ -76,16 +83,8 @@ class AnimationPlayer:
             return
         for _ in range(amount):
             # Add a small random offset to spawn position for spread
-            offset = pygame.math.Vector2(uniform(-10, 10), uniform(-10, 10))
-            spawn_pos = (pos[0] + offset.x, pos[1] + offset.y)
-            MovingParticleEffect(
-                spawn_pos,
-                orb_frames,
-                groups,
-                target_pos=target_pos,
-                speed=speed,
-                sprite_type='exp_orb',
-            )
+            spawn_pos = (pos[0] + rng.uniform(-10, 10), pos[1] + rng.uniform(-10, 10))
+            self.pool.spawn(spawn_pos, orb_frames, target_pos=target_pos, speed=speed)
         # Spawn floating text if exp_amount is provided
         if exp_amount is not None:
             self.create_floating_text(f"+{exp_amount} XP", pos, groups)
@@ -93,10 +92,11 @@ class AnimationPlayer:
 class FloatingText(pygame.sprite.Sprite):
     def __init__(self, text, pos, groups, color=(255, 255, 0), font_size=18, duration=1.2, rise_distance=30):
         super().__init__(groups)
-        self.font = pygame.font.Font(get_path('../font/joystix.ttf'), font_size)
+        self.font = assets.font(UI_FONT, font_size)
         self.text = text
         self.color = color
-        self.image = self.font.render(self.text, True, self.color)
+        # copied because the fade changes the surface's alpha
+        self.image = text_cache.render(self.font, self.text, self.color, True).copy()
         self.rect = self.image.get_rect(center=pos)
         self.start_pos = pygame.math.Vector2(pos)
         self.duration = duration
@@ -119,6 +119,125 @@ class FloatingText(pygame.sprite.Sprite):
 
 
 
+class ParticlePool:
+    """
+    Fixed-capacity store for cosmetic particles (hits, leaves, deaths, heal
+    and exp orbs). Every particle lives in a slot of parallel arrays and the
+    whole pool is advanced in one batched kernel step per frame and drawn in
+    its own layer on top of the world, so bursts never touch the sprite
+    groups or the Y-sort. When the pool is full new particles are dropped.
+    """
+
+    def __init__(self, capacity, animation_speed=15, kernel=kernel):
+        self.capacity = capacity
+        self.animation_speed = animation_speed
+        self.kernel = kernel
+
+        self.x = kernel.zeros(capacity)
+        self.y = kernel.zeros(capacity)
+        self.target_x = kernel.zeros(capacity)
+        self.target_y = kernel.zeros(capacity)
+        self.speed = kernel.zeros(capacity)  # 0 for particles that stay in place
+        self.frame = kernel.zeros(capacity)
+        self.frame_count = kernel.zeros(capacity)
+        self.lifetime = kernel.zeros(capacity)
+        self.max_lifetime = kernel.zeros(capacity)
+        self.frames = [None] * capacity
+
+        self.free = list(range(capacity - 1, -1, -1))
+        self.live = []
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def spawn(self, pos, frames, target_pos=None, speed=0, max_lifetime=1.5):
+        """Start a particle at pos, homing on target_pos when given. Returns its slot or None."""
+        if not self.free:
+            self.dropped += 1
+            return None
+        slot = self.free.pop()
+        self.x[slot] = pos[0]
+        self.y[slot] = pos[1]
+        if target_pos is not None:
+            self.target_x[slot] = target_pos[0]
+            self.target_y[slot] = target_pos[1]
+            self.speed[slot] = speed
+        else:
+            self.speed[slot] = 0
+        self.frame[slot] = 0
+        self.frame_count[slot] = len(frames)
+        self.frames[slot] = frames
+        self.lifetime[slot] = 0
+        self.max_lifetime[slot] = max_lifetime
+        self.live.append(slot)
+        return slot
+
+    def update(self, dt):
+        if not self.live:
+            return
+        finished = self.kernel.advance(self, self.live, dt)
+        if finished:
+            for slot in finished:
+                self.frames[slot] = None
+            self.free.extend(finished)
+            done = set(finished)
+            self.live = [slot for slot in self.live if slot not in done]
+
+    def draw(self, surface, offset):
+        if not self.live:
+            return
+        offset_x, offset_y = offset
+        frames = self.frames
+        x, y, frame = self.kernel.to_list(self.x), self.kernel.to_list(self.y), self.kernel.to_list(self.frame)
+        blits = []
+        for slot in self.live:
+            image = frames[slot][int(frame[slot])]
+            width, height = image.get_size()
+            blits.append((image, (round(x[slot]) - width // 2 - offset_x,
+                                  round(y[slot]) - height // 2 - offset_y)))
+        surface.blits(blits, False)
+
+
+class DriftParticles:
+    """
+    Dots drifting at a constant per-frame speed that wrap around the screen,
+    used as a backdrop on the menu screens.
+    """
+
+    def __init__(self, width, height, kernel=kernel):
+        self.width = width
+        self.height = height
+        self.kernel = kernel
+        self.x = kernel.zeros(0)
+        self.y = kernel.zeros(0)
+        self.speed_x = kernel.zeros(0)
+        self.speed_y = kernel.zeros(0)
+        self.sizes = []
+        self.colors = []
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def reset(self, particles):
+        """Replace all particles with (x, y, speed_x, speed_y, size, color) tuples."""
+        columns = list(zip(*particles)) or [()] * 6
+        for name, values in zip(('x', 'y', 'speed_x', 'speed_y'), columns):
+            array = self.kernel.zeros(len(values))
+            array[:] = values
+            setattr(self, name, array)
+        self.sizes = list(columns[4])
+        self.colors = list(columns[5])
+
+    def update(self):
+        self.kernel.drift(self.x, self.y, self.speed_x, self.speed_y, self.width, self.height)
+
+    def draw(self, surface):
+        x, y = self.kernel.to_list(self.x), self.kernel.to_list(self.y)
+        for index, size in enumerate(self.sizes):
+            pygame.draw.circle(surface, self.colors[index], (int(x[index]), int(y[index])), size)
+
+
 class ParticleEffect(pygame.sprite.Sprite):
     def __init__(self, pos, animation_frames, groups, sprite_type='magic'):
         super().__init__(groups)
@@ -138,32 +257,3 @@ class ParticleEffect(pygame.sprite.Sprite):
 
     def update(self, dt):
         self.animate(dt)
-
-
-# MovingParticleEffect for exp orbs
-class MovingParticleEffect(ParticleEffect):
-    def __init__(self, pos, animation_frames, groups, target_pos, speed=250, sprite_type='exp_orb', max_lifetime=1.5):
-        super().__init__(pos, animation_frames, groups, sprite_type)
-        self.target_pos = pygame.math.Vector2(target_pos)
-        self.pos = pygame.math.Vector2(pos)
-        self.speed = speed  # pixels per second
-        self.max_lifetime = max_lifetime  # seconds
-        self.lifetime = 0
-
-    def update(self, dt):
-        # Move towards target
-        direction = self.target_pos - self.pos
-        distance = direction.length()
-        if distance > 0:
-            direction = direction.normalize()
-            move_dist = min(self.speed * dt, distance)
-            self.pos += direction * move_dist
-            self.rect.center = (round(self.pos.x), round(self.pos.y))
-
-        # Animate
-        self.animate(dt)
-
-        # Lifetime
-        self.lifetime += dt
-        if distance < 16 or self.lifetime > self.max_lifetime:
-            self.kill()
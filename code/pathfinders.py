@@ -0,0 +1,354 @@
+import heapq
+from collections import deque
+from perf import timed
+
+
+class JumpPointSearch:
+    """
+    Jump Point Search for the 4-connected PathGrid.
+    Paths are made canonical by preferring horizontal moves first: a vertical
+    run only turns sideways where an obstacle forces it, and every cell of a
+    horizontal run scans up and down for jump points. Only jump points enter
+    the open list, which keeps expansions low on open fields.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.searches = 0
+        self.expansions = 0
+
+    def walkable(self, x, y):
+        grid = self.grid
+        return 0 <= x < grid.width and 0 <= y < grid.height and not grid.cells[y * grid.width + x]
+
+    @timed('path_search')
+    def find_path(self, start, goal):
+        """Returns a list of (x, y) cells from start to goal (inclusive), or []."""
+        if not self.walkable(*start) or not self.walkable(*goal):
+            return []
+        self.searches += 1
+
+        goal_x, goal_y = goal
+        g = {start: 0}
+        parent = {start: None}
+        closed = set()
+        h = abs(start[0] - goal_x) + abs(start[1] - goal_y)
+        open_heap = [(h, h, start)]
+
+        while open_heap:
+            current = heapq.heappop(open_heap)[2]
+            if current in closed:
+                continue
+            closed.add(current)
+            self.expansions += 1
+            if current == goal:
+                return self._expand_path(current, parent)
+
+            for jump_point in self._successors(current, parent[current], goal):
+                if jump_point in closed:
+                    continue
+                tentative = g[current] + abs(jump_point[0] - current[0]) + abs(jump_point[1] - current[1])
+                if tentative < g.get(jump_point, float('inf')):
+                    g[jump_point] = tentative
+                    parent[jump_point] = current
+                    h = abs(jump_point[0] - goal_x) + abs(jump_point[1] - goal_y)
+                    heapq.heappush(open_heap, (tentative + h, h, jump_point))
+        return []
+
+    def _successors(self, node, parent, goal):
+        x, y = node
+        if parent is None:
+            directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        elif parent[1] == y:  # arrived horizontally: keep going or branch vertically
+            dx = 1 if x > parent[0] else -1
+            directions = ((dx, 0), (0, 1), (0, -1))
+        else:  # arrived vertically: keep going, turn only where forced
+            dy = 1 if y > parent[1] else -1
+            directions = [(0, dy)]
+            for sx in (1, -1):
+                if self.walkable(x + sx, y) and not self.walkable(x + sx, y - dy):
+                    directions.append((sx, 0))
+
+        for dx, dy in directions:
+            jump_point = self._jump(x, y, dx, dy, goal)
+            if jump_point is not None:
+                yield jump_point
+
+    def _jump(self, x, y, dx, dy, goal):
+        width, height, cells = self.grid.width, self.grid.height, self.grid.cells
+        while True:
+            x += dx
+            y += dy
+            if not (0 <= x < width and 0 <= y < height) or cells[y * width + x]:
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if dx:
+                # a horizontal cell is a jump point if a vertical run from it finds one
+                if self._jump(x, y, 0, 1, goal) is not None or self._jump(x, y, 0, -1, goal) is not None:
+                    return (x, y)
+            else:
+                behind = (y - dy) * width
+                for side in (x + 1, x - 1):
+                    if 0 <= side < width and not cells[y * width + side] and cells[behind + side]:
+                        return (x, y)
+
+    def _expand_path(self, node, parent):
+        jump_points = []
+        while node is not None:
+            jump_points.append(node)
+            node = parent[node]
+        jump_points.reverse()
+
+        path = [jump_points[0]]
+        for (x, y), (next_x, next_y) in zip(jump_points, jump_points[1:]):
+            step_x = (next_x > x) - (next_x < x)
+            step_y = (next_y > y) - (next_y < y)
+            while (x, y) != (next_x, next_y):
+                x += step_x
+                y += step_y
+                path.append((x, y))
+        return path
+
+
+class HierarchicalSearch:
+    """
+    HPA*-style search: the grid is split into square clusters, entrances along
+    shared cluster borders become portal nodes, and portals of one cluster are
+    linked by precomputed in-cluster paths. A query links start and goal to the
+    portals of their clusters, searches the small portal graph, then stitches
+    the stored cell paths together. Paths are near-optimal, not always shortest.
+    """
+
+    MAX_SINGLE_ENTRANCE = 6
+
+    def __init__(self, grid, cluster_size=10):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-grid.width // cluster_size)
+        self.clusters_y = -(-grid.height // cluster_size)
+        self.searches = 0
+        self.expansions = 0
+
+        # (cluster, neighbour cluster) -> list of (node, node across the border)
+        self.entrances = {}
+        # cluster -> {portal: {other portal: (cost, node path)}}
+        self.intra = {}
+        # portal -> portals right across a cluster border
+        self.across = {}
+        self.build()
+        self.expansions = 0
+        self.version = grid.version
+
+    # preprocessing
+    def build(self):
+        self.entrances.clear()
+        self.intra.clear()
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                self._build_borders((cx, cy))
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                self._build_intra((cx, cy))
+        self._build_across()
+
+    def refresh(self):
+        """Catch up with grid edits made since the last query, cluster by cluster."""
+        if self.grid.version == self.version:
+            return
+        changed = self.grid.changes_since(self.version)
+        self.version = self.grid.version
+        if changed is None:
+            self.build()
+        else:
+            self.rebuild_clusters({self.cluster_of(index) for index in changed})
+
+    def rebuild_clusters(self, clusters):
+        # a changed cell can move the entrances on all four borders of its
+        # cluster, which changes the portals of the neighbouring clusters too
+        touched = set()
+        for cx, cy in clusters:
+            for cluster in ((cx, cy), (cx - 1, cy), (cx, cy - 1)):
+                if cluster[0] >= 0 and cluster[1] >= 0:
+                    self._build_borders(cluster)
+            for cluster in ((cx, cy), (cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                if 0 <= cluster[0] < self.clusters_x and 0 <= cluster[1] < self.clusters_y:
+                    touched.add(cluster)
+        for cluster in touched:
+            self._build_intra(cluster)
+        self._build_across()
+
+    def _build_across(self):
+        self.across = {}
+        for transitions in self.entrances.values():
+            for a, b in transitions:
+                self.across.setdefault(a, []).append(b)
+
+    def cluster_of(self, node):
+        width = self.grid.width
+        return (node % width // self.cluster_size, node // width // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        size = self.cluster_size
+        left, top = cluster[0] * size, cluster[1] * size
+        return left, top, min(left + size, self.grid.width), min(top + size, self.grid.height)
+
+    def _build_borders(self, cluster):
+        cx, cy = cluster
+        left, top, right, bottom = self.cluster_bounds(cluster)
+        width, cells = self.grid.width, self.grid.cells
+        if cx + 1 < self.clusters_x:
+            # right border: column right - 1 against column right
+            pairs = [((y * width + right - 1), (y * width + right)) for y in range(top, bottom)]
+            self._add_entrances(cluster, (cx + 1, cy), pairs, cells)
+        if cy + 1 < self.clusters_y:
+            # bottom border: row bottom - 1 against row bottom
+            pairs = [((bottom - 1) * width + x, bottom * width + x) for x in range(left, right)]
+            self._add_entrances(cluster, (cx, cy + 1), pairs, cells)
+
+    def _add_entrances(self, cluster, neighbour, pairs, cells):
+        transitions = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and not cells[a] and not cells[b]:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) < self.MAX_SINGLE_ENTRANCE:
+                    transitions.append(run[len(run) // 2])
+                else:
+                    transitions.extend((run[0], run[-1]))
+                run = []
+        self.entrances[(cluster, neighbour)] = transitions
+        self.entrances[(neighbour, cluster)] = [(b, a) for a, b in transitions]
+
+    def portals(self, cluster):
+        cx, cy = cluster
+        nodes = []
+        for neighbour in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+            nodes.extend(a for a, _ in self.entrances.get((cluster, neighbour), ()))
+        return nodes
+
+    def _build_intra(self, cluster):
+        portals = self.portals(cluster)
+        links = {portal: {} for portal in portals}
+        for portal in portals:
+            parent = self._cluster_bfs(portal, cluster)
+            for other in portals:
+                if other != portal and other in parent:
+                    path = self._trace(parent, other)
+                    links[portal][other] = (len(path) - 1, path)
+        self.intra[cluster] = links
+
+    def _cluster_bfs(self, source, cluster):
+        left, top, right, bottom = self.cluster_bounds(cluster)
+        width, cells = self.grid.width, self.grid.cells
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            self.expansions += 1
+            x, y = node % width, node // width
+            for nx, ny in ((x, y + 1), (x + 1, y), (x - 1, y), (x, y - 1)):
+                if left <= nx < right and top <= ny < bottom:
+                    neighbour = ny * width + nx
+                    if neighbour not in parent and not cells[neighbour]:
+                        parent[neighbour] = node
+                        queue.append(neighbour)
+        return parent
+
+    def _trace(self, parent, node):
+        path = []
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return tuple(path)
+
+    # queries
+    @timed('path_search')
+    def find_path(self, start, goal):
+        """Returns a list of (x, y) cells from start to goal (inclusive), or []."""
+        grid = self.grid
+        if not grid.in_bounds(*start) or not grid.in_bounds(*goal):
+            return []
+        if grid.is_blocked(*start) or grid.is_blocked(*goal):
+            return []
+        self.refresh()
+        self.searches += 1
+
+        start_id, goal_id = grid.index(*start), grid.index(*goal)
+        start_cluster, goal_cluster = self.cluster_of(start_id), self.cluster_of(goal_id)
+
+        start_parent = self._cluster_bfs(start_id, start_cluster)
+        if goal_id in start_parent:
+            return self._to_cells(self._trace(start_parent, goal_id))
+
+        # temporary links from start and to goal
+        start_links = {portal: self._trace(start_parent, portal)
+                       for portal in self.portals(start_cluster) if portal in start_parent}
+        goal_parent = self._cluster_bfs(goal_id, goal_cluster)
+        goal_links = {portal: tuple(reversed(self._trace(goal_parent, portal)))
+                      for portal in self.portals(goal_cluster) if portal in goal_parent}
+
+        width = grid.width
+        goal_x, goal_y = goal
+        g = {start_id: 0}
+        came_from = {start_id: None}
+        closed = set()
+        open_heap = [(0, 0, start_id)]
+        while open_heap:
+            node = heapq.heappop(open_heap)[2]
+            if node in closed:
+                continue
+            closed.add(node)
+            self.expansions += 1
+            if node == goal_id:
+                return self._stitch(node, came_from)
+
+            if node == start_id:
+                edges = [(portal, len(path) - 1, path) for portal, path in start_links.items()]
+            else:
+                edges = [(other, cost, path) for other, (cost, path) in
+                         self.intra[self.cluster_of(node)].get(node, {}).items()]
+            edges.extend((other, 1, (node, other)) for other in self.across.get(node, ()))
+            if node in goal_links:
+                path = goal_links[node]
+                edges.append((goal_id, len(path) - 1, path))
+
+            for other, cost, path in edges:
+                if other in closed:
+                    continue
+                tentative = g[node] + cost
+                if tentative < g.get(other, float('inf')):
+                    g[other] = tentative
+                    came_from[other] = (node, path)
+                    h = abs(other % width - goal_x) + abs(other // width - goal_y)
+                    heapq.heappush(open_heap, (tentative + h, h, other))
+        return []
+
+    def _stitch(self, node, came_from):
+        segments = []
+        while came_from[node] is not None:
+            node, path = came_from[node]
+            segments.append(path)
+        nodes = []
+        for path in reversed(segments):
+            nodes.extend(path[1:] if nodes else path)
+        return self._to_cells(nodes)
+
+    def _to_cells(self, nodes):
+        width = self.grid.width
+        return [(node % width, node // width) for node in nodes]
+
+
+PATHFINDERS = {
+    'astar': lambda grid: grid.search(),
+    'jps': JumpPointSearch,
+    'hpa': HierarchicalSearch,
+}
+
+
+def create_pathfinder(backend, grid):
+    """Build the per-enemy search backend named in settings for grid."""
+    return PATHFINDERS[backend](grid)
@@ -1,72 +1,313 @@
 import heapq
+from array import array
+from collections import deque, OrderedDict
+from perf import timed
 
 def heuristic(a, b):
     # Manhattan distance
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
+class PathGrid:
+    """
+    Walkability grid stored row-major in a flat bytearray.
+    0 = walkable, 1 = obstacle; cell (x, y) lives at index y * width + x.
+    """
+    CHANGE_LOG_SIZE = 1024
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+        # bumped on every change so searches can drop stale cached paths
+        self.version = 0
+        # (version, index) of recent runtime edits, for incremental updates
+        self.changes = deque(maxlen=self.CHANGE_LOG_SIZE)
+        self._search = None
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def is_blocked(self, x, y):
+        return self.cells[y * self.width + x] == 1
+
+    def block(self, x, y):
+        self.cells[y * self.width + x] = 1
+        self.version += 1
+
+    def set_walkable(self, cell, walkable=True):
+        """
+        Change one cell at runtime (e.g. when grass is cut). Only bumps the
+        version: caches and flow fields built on the grid notice it lazily.
+        """
+        index = self.index(*cell)
+        value = 0 if walkable else 1
+        if self.cells[index] != value:
+            self.cells[index] = value
+            self.version += 1
+            self.changes.append((self.version, index))
+
+    def changes_since(self, version):
+        """
+        Indices of cells changed after version, or None if the change log no
+        longer reaches back that far and the caller has to rebuild from scratch.
+        """
+        if version == self.version:
+            return []
+        if not self.changes or self.changes[0][0] > version + 1:
+            return None
+        return [index for changed, index in self.changes if changed > version]
+
+    def search(self):
+        """The AStarSearch shared by every caller searching this grid."""
+        if self._search is None:
+            self._search = AStarSearch(self)
+        return self._search
+
+
+class AStarSearch:
+    """
+    A* over a PathGrid using integer node ids (y * width + x).
+    Score arrays are allocated once and invalidated by bumping a generation
+    counter instead of being cleared. Open-list ties on f are broken on h.
+    Found paths are kept in an LRU cache keyed by (start, goal, grid version),
+    and every node on a cached path can reuse its suffix to the same goal,
+    so enemies chasing one player share most of their searches.
+    """
+
+    def __init__(self, grid, cache_size=256):
+        self.grid = grid
+        self.cache_size = cache_size
+        size = grid.width * grid.height
+        self.g = array('i', [0]) * size
+        self.parent = array('i', [-1]) * size
+        self.seen = array('I', [0]) * size
+        self.closed = array('I', [0]) * size
+        self.generation = 0
+
+        self.cache = OrderedDict()
+        self.suffixes = OrderedDict()
+        self.cache_version = grid.version
+
+        # stats
+        self.searches = 0
+        self.expansions = 0
+        self.cache_hits = 0
+        self.suffix_hits = 0
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.suffixes.clear()
+        self.cache_version = self.grid.version
+
+    @timed('path_search')
+    def find_path(self, start, goal):
+        """Returns a fresh list of (x, y) cells from start to goal (inclusive), or []."""
+        grid = self.grid
+        if not grid.in_bounds(*start) or not grid.in_bounds(*goal):
+            return []
+        if grid.is_blocked(*start) or grid.is_blocked(*goal):
+            return []
+        if grid.version != self.cache_version:
+            self.clear_cache()
+
+        start_id, goal_id = grid.index(*start), grid.index(*goal)
+        key = (start_id, goal_id)
+        path = self.cache.get(key)
+        if path is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._to_cells(path, 0)
+
+        on_path = self.suffixes.get(goal_id)
+        if on_path is not None and start_id in on_path:
+            self.suffixes.move_to_end(goal_id)
+            self.suffix_hits += 1
+            path, offset = on_path[start_id]
+            return self._to_cells(path, offset)
+
+        path = self._search(start_id, goal_id)
+        self._remember(key, goal_id, path)
+        return self._to_cells(path, 0)
+
+    def _to_cells(self, path, offset):
+        width = self.grid.width
+        return [(node % width, node // width) for node in path[offset:]]
+
+    def _remember(self, key, goal_id, path):
+        self.cache[key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        if not path:
+            return
+        on_path = self.suffixes.get(goal_id)
+        if on_path is None:
+            on_path = self.suffixes[goal_id] = {}
+            if len(self.suffixes) > self.cache_size:
+                self.suffixes.popitem(last=False)
+        else:
+            self.suffixes.move_to_end(goal_id)
+        for offset, node in enumerate(path):
+            on_path[node] = (path, offset)
+
+    def _search(self, start, goal):
+        self.searches += 1
+        self.generation += 1
+        if self.generation >= 0xFFFFFFFF:
+            self.seen[:] = array('I', [0]) * len(self.seen)
+            self.closed[:] = array('I', [0]) * len(self.closed)
+            self.generation = 1
+        generation = self.generation
+
+        width, height, cells = self.grid.width, self.grid.height, self.grid.cells
+        last_row = width * (height - 1)
+        g, parent, seen, closed = self.g, self.parent, self.seen, self.closed
+        goal_x, goal_y = goal % width, goal // width
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        seen[start] = generation
+        g[start] = 0
+        parent[start] = -1
+        h = abs(start % width - goal_x) + abs(start // width - goal_y)
+        open_heap = [(h, h, start)]
+        expansions = 0
+
+        while open_heap:
+            current = heappop(open_heap)[2]
+            if closed[current] == generation:
+                continue
+            closed[current] = generation
+            expansions += 1
+            if current == goal:
+                path = [current]
+                while parent[current] != -1:
+                    current = parent[current]
+                    path.append(current)
+                path.reverse()
+                self.expansions += expansions
+                return tuple(path)
+
+            tentative = g[current] + 1
+            x = current % width
+            # same neighbour order as before: down, right, left, up
+            for neighbor, inside in ((current + width, current < last_row), (current + 1, x < width - 1),
+                                     (current - 1, x > 0), (current - width, current >= width)):
+                if not inside or cells[neighbor] or closed[neighbor] == generation:
+                    continue
+                if seen[neighbor] != generation or tentative < g[neighbor]:
+                    seen[neighbor] = generation
+                    g[neighbor] = tentative
+                    parent[neighbor] = current
+                    h = abs(neighbor % width - goal_x) + abs(neighbor // width - goal_y)
+                    heappush(open_heap, (tentative + h, h, neighbor))
+
+        self.expansions += expansions
+        return ()
+
+
 def astar(grid, start, goal):
     """
-    grid: 2D list of 0 (walkable) and 1 (obstacle)
+    grid: PathGrid
     start, goal: (x, y) tuples
     Returns: list of (x, y) tuples from start to goal (inclusive), or [] if no path
     """
-    neighbors = [(0,1),(1,0),(-1,0),(0,-1)]
-    # Early exit if start or goal is blocked
-    if not (0 <= start[0] < len(grid[0]) and 0 <= start[1] < len(grid)) or not (0 <= goal[0] < len(grid[0]) and 0 <= goal[1] < len(grid)):
-        return []
-    if grid[start[1]][start[0]] == 1 or grid[goal[1]][goal[0]] == 1:
-        return []
-
-    close_set = set()
-    came_from = {}
-    gscore = {start:0}
-    fscore = {start:heuristic(start, goal)}
-    oheap = []
-    heapq.heappush(oheap, (fscore[start], start))
-
-    while oheap:
-        current = heapq.heappop(oheap)[1]
-        if current == goal:
-            # Reconstruct path
-            path = [current]
-            while current in came_from:
-                current = came_from[current]
-                path.append(current)
-            path.reverse()
-            return path
-        close_set.add(current)
-        for i, j in neighbors:
-            neighbor = (current[0]+i, current[1]+j)
-            tentative_g_score = gscore[current] + 1
-            if 0 <= neighbor[0] < len(grid[0]) and 0 <= neighbor[1] < len(grid):
-                if grid[neighbor[1]][neighbor[0]] == 1:
-                    continue
-            else:
-                continue
-            if neighbor in close_set and tentative_g_score >= gscore.get(neighbor, float('inf')):
+    return grid.search().find_path(start, goal)
+
+class FlowField:
+    """
+    Breadth-first distance map from a single goal cell over a PathGrid.
+    Computed once per goal change and shared by every enemy chasing that goal,
+    so each enemy reads its next step in O(1) instead of running its own search.
+    max_distance: cells further than this many steps from the goal stay unreached
+    """
+    UNREACHED = -1
+
+    def __init__(self, grid, max_distance=None):
+        self.grid = grid
+        self.max_distance = max_distance
+        self.goal = None
+        self.version = None
+        self._unreached = array('i', [self.UNREACHED]) * (grid.width * grid.height)
+        self.distances = array('i', self._unreached)
+
+    @timed('enemy_ai')
+    def update(self, goal):
+        """Recompute the field if goal or the grid changed. Returns True when it was recomputed."""
+        if goal == self.goal and self.grid.version == self.version:
+            return False
+        self.goal = goal
+        self.version = self.grid.version
+
+        grid = self.grid
+        width, height, cells = grid.width, grid.height, grid.cells
+        distances = self.distances
+        distances[:] = self._unreached
+        if not grid.in_bounds(*goal) or grid.is_blocked(*goal):
+            return True
+
+        max_distance = self.max_distance
+        goal_index = grid.index(*goal)
+        distances[goal_index] = 0
+        queue = deque([goal_index])
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            if max_distance is not None and distance > max_distance:
                 continue
-            if tentative_g_score < gscore.get(neighbor, float('inf')):
-                came_from[neighbor] = current
-                gscore[neighbor] = tentative_g_score
-                fscore[neighbor] = tentative_g_score + heuristic(neighbor, goal)
-                heapq.heappush(oheap, (fscore[neighbor], neighbor))
-    return []
+            x = index % width
+            for neighbor, inside in ((index - 1, x > 0), (index + 1, x < width - 1),
+                                     (index - width, index >= width), (index + width, index < width * (height - 1))):
+                if inside and distances[neighbor] == self.UNREACHED and cells[neighbor] == 0:
+                    distances[neighbor] = distance
+                    queue.append(neighbor)
+        return True
+
+    def next_step(self, cell):
+        """Neighbour of cell one step closer to the goal, or None if there is none."""
+        grid = self.grid
+        if not grid.in_bounds(*cell):
+            return None
+        distance = self.distances[grid.index(*cell)]
+        if distance <= 0:
+            return None
+        x, y = cell
+        for neighbor in ((x, y+1), (x+1, y), (x-1, y), (x, y-1)):
+            if grid.in_bounds(*neighbor) and self.distances[grid.index(*neighbor)] == distance - 1:
+                return neighbor
+        return None
 
 def build_grid(map_width, map_height, tile_size, obstacle_sprites):
     """
-    Returns a 2D grid (list of lists) where 0=walkable, 1=obstacle.
+    Returns a PathGrid covering the whole map.
     map_width, map_height: in pixels
     tile_size: size of one tile in pixels
     obstacle_sprites: pygame.sprite.Group of obstacles
     """
-    grid_w = map_width // tile_size
-    grid_h = map_height // tile_size
-    grid = [[0 for _ in range(grid_w)] for _ in range(grid_h)]
+    grid = PathGrid(map_width // tile_size, map_height // tile_size)
     for sprite in obstacle_sprites:
         x = int(sprite.rect.x // tile_size)
         y = int(sprite.rect.y // tile_size)
-        if 0 <= x < grid_w and 0 <= y < grid_h:
-            grid[y][x] = 1
+        if grid.in_bounds(x, y):
+            grid.block(x, y)
+    return grid
+
+def build_grid_from_map(compiled_map, removed=()):
+    """
+    Returns the PathGrid build_grid would make from the map's tile sprites,
+    read straight from a compiled map. Object sprites sit one tile above their
+    map cell, so they block the cell above. removed holds the (col, row) map
+    cells of grass that has been cut.
+    """
+    grid = PathGrid(compiled_map.width, compiled_map.height)
+    for layer in ('boundary', 'grass', 'object'):
+        row_shift = 1 if layer == 'object' else 0
+        for x, y, _ in compiled_map.cells(layer):
+            if layer == 'grass' and (x, y) in removed:
+                continue
+            if grid.in_bounds(x, y - row_shift):
+                grid.block(x, y - row_shift)
     return grid
 
 def pos_to_grid(pos, tile_size):
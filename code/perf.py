@@ -0,0 +1,158 @@
+"""
+Per-frame timings of the game's scopes.
+
+Functions decorated with @timed(scope), and blocks timed with add(), add
+their run time and call count to the scope while timings are enabled;
+disabled, the wrapper only checks a flag, so the scopes stay in place in
+normal play. Scopes nest: 'update' includes 'enemy_ai', 'collision' and
+'attack', and 'draw' includes 'custom_draw'.
+
+Every finished frame goes into a rolling histogram per scope, and when an
+export file is open, into a line of it (.csv rows or JSON lines).
+"""
+import csv
+import json
+import time
+from bisect import bisect_right
+from collections import deque
+from functools import wraps
+
+from settings import PROFILER_HISTORY
+
+# upper edges of the histogram buckets, in milliseconds; the last bucket is open
+HISTOGRAM_EDGES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16.7, 33.3)
+
+
+class RollingHistogram:
+    """The last size samples of a scope, with counts per duration bucket kept up to date."""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+
+    @staticmethod
+    def bucket(seconds):
+        return bisect_right(HISTOGRAM_EDGES_MS, seconds * 1000)
+
+    def add(self, seconds):
+        if len(self.samples) == self.samples.maxlen:
+            self.counts[self.bucket(self.samples[0])] -= 1
+        self.samples.append(seconds)
+        self.counts[self.bucket(seconds)] += 1
+
+    def mean(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def percentiles(self, points=(50, 95, 99)):
+        """Nearest-rank percentiles of the samples, in seconds."""
+        samples = sorted(self.samples)
+        if not samples:
+            return [0.0 for _ in points]
+        return [samples[min(len(samples) - 1, max(0, -(-len(samples) * point // 100) - 1))] for point in points]
+
+
+class FrameTimings:
+    def __init__(self, history=PROFILER_HISTORY):
+        self.enabled = False
+        self.history_size = history
+        # scope -> seconds and calls in the frame being timed
+        self.current = {}
+        self.current_calls = {}
+        # scope -> RollingHistogram of seconds per finished frame
+        self.history = {}
+        # scope -> calls per finished frame
+        self.calls = {}
+        # name -> value of the last frame, e.g. sprite counts
+        self.gauges = {}
+        self.frame_count = 0
+        self.export_file = None
+        self.export_writer = None
+
+    def add(self, scope, seconds, calls=1):
+        self.current[scope] = self.current.get(scope, 0.0) + seconds
+        self.current_calls[scope] = self.current_calls.get(scope, 0) + calls
+
+    def end_frame(self):
+        for scope in self.history.keys() | self.current.keys():
+            if scope not in self.history:
+                # a scope seen for the first time took no time in the frames before
+                self.history[scope] = RollingHistogram(self.history_size)
+                self.calls[scope] = deque(maxlen=self.history_size)
+                for _ in range(min(self.frame_count, self.history_size)):
+                    self.history[scope].add(0.0)
+                    self.calls[scope].append(0)
+            self.history[scope].add(self.current.get(scope, 0.0))
+            self.calls[scope].append(self.current_calls.get(scope, 0))
+        if self.export_file is not None:
+            self.export_frame()
+        self.frame_count += 1
+        self.current = {}
+        self.current_calls = {}
+
+    def reset(self, history=PROFILER_HISTORY):
+        self.history_size = history
+        self.current = {}
+        self.current_calls = {}
+        self.history = {}
+        self.calls = {}
+        self.gauges = {}
+        self.frame_count = 0
+
+    def percentiles(self, scope, points=(50, 95, 99)):
+        """Percentiles of a scope's recent frame times, in seconds."""
+        histogram = self.history.get(scope)
+        if histogram is None:
+            return [0.0 for _ in points]
+        return histogram.percentiles(points)
+
+    def calls_per_frame(self, scope):
+        calls = self.calls.get(scope)
+        return sum(calls) / len(calls) if calls else 0.0
+
+    # export
+    def export_to(self, path):
+        """Write every following frame to path: CSV rows if it ends in .csv, JSON lines otherwise."""
+        self.close_export()
+        self.export_file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self.export_writer = csv.writer(self.export_file)
+            self.export_writer.writerow(('frame', 'kind', 'name', 'value'))
+
+    def export_frame(self):
+        if self.export_writer is not None:
+            rows = [(self.frame_count, 'ms', scope, round(seconds * 1000, 4)) for scope, seconds in self.current.items()]
+            rows += [(self.frame_count, 'calls', scope, calls) for scope, calls in self.current_calls.items()]
+            rows += [(self.frame_count, 'gauge', name, value) for name, value in self.gauges.items()]
+            self.export_writer.writerows(rows)
+        else:
+            self.export_file.write(json.dumps({
+                'frame': self.frame_count,
+                'ms': {scope: round(seconds * 1000, 4) for scope, seconds in self.current.items()},
+                'calls': self.current_calls,
+                'gauges': self.gauges,
+            }) + '\n')
+
+    def close_export(self):
+        if self.export_file is not None:
+            self.export_file.close()
+        self.export_file = None
+        self.export_writer = None
+
+
+timings = FrameTimings()
+
+
+def timed(scope):
+    """Decorator adding the function's run time and calls to scope."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not timings.enabled:
+                return function(*args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.add(scope, time.perf_counter() - start_time)
+        return wrapper
+    return decorate
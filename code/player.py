@@ -2,6 +2,8 @@ import pygame
 from settings import weapon_data, magic_data, HITBOX_OFFSET
 from support import get_path, import_folder
 from entity import Entity
+from sim_clock import sim_clock
+from controls import keyboard
 
 
 class Player(Entity):
@@ -43,7 +45,8 @@ class Player(Entity):
         self.import_player_assets()
         self.status = 'down'
 
-        # movement
+        # movement; the keyboard unless a headless run scripts the input
+        self.input_source = keyboard
         self.attacking = False
         self.attack_cooldown = 400
         self.attack_time = None
@@ -118,7 +121,7 @@ class Player(Entity):
 
     def input(self):
         if not self.attacking:
-            keys = pygame.key.get_pressed()
+            keys = self.input_source.get_pressed()
 
             # movement
             if keys[pygame.K_UP] or keys[pygame.K_w]:
@@ -142,7 +145,7 @@ class Player(Entity):
             # attack
             if keys[pygame.K_SPACE]:
                 self.attacking = True
-                self.attack_time = pygame.time.get_ticks()
+                self.attack_time = sim_clock.get_ticks()
                 self.create_attack()
                 self.weapon_attack_sound.play()
                 self.direction.x = 0
@@ -151,7 +154,7 @@ class Player(Entity):
             # magic
             if keys[pygame.K_LCTRL]:
                 self.attacking = True
-                self.attack_time = pygame.time.get_ticks()
+                self.attack_time = sim_clock.get_ticks()
 
                 style = list(magic_data.keys())[self.magic_index]
                 strength = list(magic_data.values())[
@@ -163,7 +166,7 @@ class Player(Entity):
 
             if keys[pygame.K_q] and self.can_switch_weapon:
                 self.can_switch_weapon = False
-                self.weapon_switch_time = pygame.time.get_ticks()
+                self.weapon_switch_time = sim_clock.get_ticks()
 
                 if self.weapon_index < len(list(weapon_data.keys()))-1:
                     self.weapon_index += 1
@@ -174,7 +177,7 @@ class Player(Entity):
 
             if keys[pygame.K_e] and self.can_switch_magic:
                 self.can_switch_magic = False
-                self.magic_switch_time = pygame.time.get_ticks()
+                self.magic_switch_time = sim_clock.get_ticks()
 
                 if self.magic_index < len(list(magic_data.keys()))-1:
                     self.magic_index += 1
@@ -201,7 +204,7 @@ class Player(Entity):
                     self.status = self.status.replace('_attack', '')
 
     def cooldowns(self):
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
 
         if self.attacking:
             if current_time - self.attack_time >= self.attack_cooldown + weapon_data[self.weapon]['cooldown']:
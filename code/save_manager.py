@@ -1,17 +1,347 @@
+"""
+Crash-safe saves in rotating slots.
+
+The game state is encoded on the calling thread, then compressed and written
+on a background thread: each save goes to the next of SAVE_SLOTS files
+through a temp file, fsync and rename, so a crash mid-write never damages
+an existing slot. Every slot starts with a header holding a sequence number
+and a CRC32 of its payload; loading takes the newest slot that checks out.
+
+Between full saves, changes are appended to a journal (see SaveJournal)
+that loading replays on top of the newest slot.
+
+Two payload formats: 'json', and 'binary', where the removed-grass and
+defeated-enemy lists are packed as (map, x, y) records instead of JSON
+objects, which keeps saves small as the world state grows.
+"""
+import atexit
+import glob
 import json
 import os
+import queue
+import struct
+import threading
+import zlib
+
+from settings import SAVE_PATH, SAVE_SLOTS, SAVE_FORMAT, SAVE_JOURNAL_COMPACT_EVENTS
+from world_state import SAVE_KEYS
+
+LEGACY_SAVE_PATH = 'savegame.json'
+JOURNAL_PATH = f'{SAVE_PATH}.journal'
+
+MAGIC = b'PZSV'
+VERSION = 1
+# magic, version, payload format, sequence number, crc32 and size of the compressed payload
+HEADER = struct.Struct('<4sBBQII')
+FORMATS = {'json': 0, 'binary': 1}
+
+# top-level lists of {'map_id', 'x', 'y'} entries that the binary format packs
+PACKED_LISTS = ('destroyed_grass', 'defeated_enemies')
+COUNT = struct.Struct('<I')
+ENTRY = struct.Struct('<Hii')
+
+
+def encode_json(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def encode_binary(data):
+    rest = {key: value for key, value in data.items() if key not in PACKED_LISTS}
+    map_ids = sorted({entry['map_id'] for key in PACKED_LISTS for entry in data.get(key, ())})
+    map_index = {map_id: index for index, map_id in enumerate(map_ids)}
+
+    parts = [encode_json(rest), encode_json(map_ids)]
+    chunks = [COUNT.pack(len(part)) + part for part in parts]
+    for key in PACKED_LISTS:
+        entries = data.get(key, ())
+        chunks.append(COUNT.pack(len(entries)))
+        chunks.extend(ENTRY.pack(map_index[entry['map_id']], entry['x'], entry['y']) for entry in entries)
+    return b''.join(chunks)
+
+
+def decode_binary(payload):
+    position = 0
+    parts = []
+    for _ in range(2):
+        (size,) = COUNT.unpack_from(payload, position)
+        position += COUNT.size
+        parts.append(json.loads(payload[position:position + size]))
+        position += size
+    data, map_ids = parts
+
+    for key in PACKED_LISTS:
+        (count,) = COUNT.unpack_from(payload, position)
+        position += COUNT.size
+        entries = []
+        for map_index, x, y in ENTRY.iter_unpack(payload[position:position + count * ENTRY.size]):
+            entries.append({'map_id': map_ids[map_index], 'x': x, 'y': y})
+        position += count * ENTRY.size
+        data[key] = entries
+    return data
+
+
+def encode(data, save_format):
+    if save_format == 'binary':
+        return encode_binary(data)
+    return encode_json(data)
+
+
+def decode(payload, format_id):
+    if format_id == FORMATS['binary']:
+        return decode_binary(payload)
+    return json.loads(payload)
+
+
+def slot_path(slot, base_path=SAVE_PATH):
+    return f'{base_path}.{slot}.sav'
+
+
+def read_slot(path):
+    """(sequence, data) of a slot file; raises ValueError if it is damaged."""
+    with open(path, 'rb') as file:
+        blob = file.read()
+    if len(blob) < HEADER.size:
+        raise ValueError('truncated header')
+    magic, version, format_id, sequence, checksum, size = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a save file')
+    compressed = blob[HEADER.size:]
+    if len(compressed) != size or zlib.crc32(compressed) != checksum:
+        raise ValueError('checksum mismatch')
+    try:
+        return sequence, decode(zlib.decompress(compressed), format_id)
+    except (zlib.error, struct.error, UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f'undecodable payload: {error}')
+
+
+def write_atomic(path, blob):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(blob)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    # make the rename itself durable where directories can be synced
+    if hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class SaveWriter:
+    """Background thread that runs file jobs in order: compressed save slots and journal writes."""
+
+    def __init__(self, base_path=SAVE_PATH, slots=SAVE_SLOTS):
+        self.base_path = base_path
+        self.slots = slots
+        self.sequence = None
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.last_error = None
+
+    def next_sequence(self):
+        if self.sequence is None:
+            sequences = [sequence for sequence, _, _ in scan_slots(self.base_path)]
+            self.sequence = max(sequences, default=0)
+        self.sequence += 1
+        return self.sequence
+
+    def submit(self, job, *args):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='save-writer', daemon=True)
+                self.thread.start()
+        self.queue.put((job, args))
+
+    def save(self, data, save_format=SAVE_FORMAT):
+        """Snapshot data now; the file is written in the background. Returns the save's sequence number."""
+        payload = encode(data, save_format)
+        with self.lock:
+            sequence = self.next_sequence()
+        self.submit(self.write_slot, sequence, FORMATS[save_format], payload)
+        return sequence
+
+    def write_slot(self, sequence, format_id, payload):
+        compressed = zlib.compress(payload, 6)
+        header = HEADER.pack(MAGIC, VERSION, format_id, sequence, zlib.crc32(compressed), len(compressed))
+        write_atomic(slot_path(sequence % self.slots, self.base_path), header + compressed)
+
+    def run(self):
+        while True:
+            job, args = self.queue.get()
+            try:
+                job(*args)
+            except OSError as error:
+                self.last_error = error
+                print(f"Warning: Could not write save: {error}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every queued write is on disk."""
+        self.queue.join()
+
+
+class SaveJournal:
+    """
+    Append-only log of what changed since the last full save, so autosaves
+    only write a few lines. Events are buffered on the main thread and
+    appended in batches by the save writer; the first line names the save
+    the journal continues, and every full save starts a new journal.
+    Nothing is written until this game has had its first full save, since
+    the journal on disk may still continue another game's save.
+    """
+
+    def __init__(self, writer, path):
+        self.writer = writer
+        self.path = path
+        self.pending = []
+        # events written since the last full save
+        self.size = 0
+        self.active = False
+
+    def record(self, event):
+        self.pending.append(event)
+
+    def flush(self):
+        if not self.active or not self.pending:
+            return
+        blob = b''.join(encode_json(event) + b'\n' for event in self.pending)
+        self.size += len(self.pending)
+        self.pending = []
+        self.writer.submit(self.append, blob)
+
+    def append(self, blob):
+        with open(self.path, 'ab') as file:
+            file.write(blob)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def restart(self, base):
+        """Start over after the full save with sequence number base, which holds everything journaled so far."""
+        self.pending = []
+        self.size = 0
+        self.active = True
+        self.writer.submit(write_atomic, self.path, encode_json({'base': base}) + b'\n')
+
+
+def read_journal(path):
+    """(base, events) of a journal; reading stops at the first damaged line, where a crash cut it off."""
+    try:
+        with open(path, 'rb') as file:
+            lines = file.read().split(b'\n')
+    except OSError:
+        return None, []
+    try:
+        base = json.loads(lines[0])['base']
+    except (ValueError, KeyError, TypeError):
+        return None, []
+    events = []
+    for line in lines[1:]:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            break
+    return base, events
+
+
+def apply_event(data, event):
+    """Bring a saved state up to date with one journaled event."""
+    kind = event['type']
+    if kind == 'remove':
+        entry = {'map_id': event['map_id'], 'x': event['x'], 'y': event['y']}
+        data.setdefault(SAVE_KEYS[event['kind']], []).append(entry)
+    elif kind == 'upgrade':
+        player = data['player']
+        player['stats'][event['stat']] = event['value']
+        player['upgrade_cost'][event['stat']] = event['cost']
+        player['exp'] = event['exp']
+    elif kind in ('player', 'map'):
+        data['player'] = event['player']
+        data['map_id'] = event['map_id']
+
+
+def scan_slots(base_path=SAVE_PATH):
+    """(sequence, path, data) of every readable slot, newest first."""
+    found = []
+    for path in glob.glob(glob.escape(base_path) + '.*.sav'):
+        try:
+            sequence, data = read_slot(path)
+        except (OSError, ValueError) as error:
+            print(f"Warning: Skipping damaged save {path}: {error}")
+            continue
+        found.append((sequence, path, data))
+    found.sort(key=lambda item: item[0], reverse=True)
+    return found
+
+
+save_writer = SaveWriter()
+journal = SaveJournal(save_writer, JOURNAL_PATH)
+
+
+def flush_saves():
+    journal.flush()
+    save_writer.flush()
+
+
+atexit.register(flush_saves)
+
+
+def save_game(data):
+    """Full save of the game state in the background; the journal starts over from it."""
+    sequence = save_writer.save(data)
+    journal.restart(sequence)
+    return sequence
+
+
+def reset_journal():
+    """Forget the journal of the game being left; the next autosave is a full save."""
+    journal.pending = []
+    journal.active = False
+
+
+def record_event(event):
+    """Journal a change to the game state; it reaches the disk with the next autosave."""
+    journal.record(event)
+
+
+def autosave(level):
+    """Journal the player's state, or fold the journal into a full save once it has grown long."""
+    if not journal.active or journal.size + len(journal.pending) >= SAVE_JOURNAL_COMPACT_EVENTS:
+        save_game(level.get_savable_state())
+        return
+    journal.record({'type': 'player', 'map_id': level.map_id, 'player': level.player.to_dict()})
+    journal.flush()
+
+
+def save_exists():
+    return bool(glob.glob(glob.escape(SAVE_PATH) + '.*.sav')) or os.path.exists(LEGACY_SAVE_PATH)
 
-def save_game(data, filepath='savegame.json'):
-    """Save the game state to a JSON file."""
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
 
-def load_game(filepath='savegame.json'):
-    """Load the game state from a JSON file. Returns None if not found or error."""
-    if not os.path.exists(filepath):
+def load_game():
+    """
+    Load the newest intact save with the journal written after it replayed,
+    falling back to older slots and the old JSON save. Returns None if none.
+    """
+    flush_saves()
+    slots = scan_slots()
+    if slots:
+        sequence, _, data = slots[0]
+        base, events = read_journal(JOURNAL_PATH)
+        if base == sequence:
+            for event in events:
+                apply_event(data, event)
+        elif events:
+            print(f"Warning: Ignoring save journal written after save {base}, loaded save {sequence}")
+        return data
+    if not os.path.exists(LEGACY_SAVE_PATH):
         return None
     try:
-        with open(filepath, 'r') as f:
+        with open(LEGACY_SAVE_PATH, 'r') as f:
             return json.load(f)
-    except Exception:
+    except (OSError, ValueError) as error:
+        print(f"Warning: Could not read {LEGACY_SAVE_PATH}: {error}")
         return None
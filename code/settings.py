@@ -4,6 +4,10 @@ from support import get_path
 WIDTH = 1280
 HEIGHT = 720
 FPS = 120
+# the world is simulated in fixed steps at this rate, independent of the frame rate
+SIMULATION_RATE = 60
+# longest stretch of real time one frame may simulate; after a hitch the game slows down instead
+MAX_FRAME_TIME = 0.25
 TILESIZE = 64
 HITBOX_OFFSET = {
     'player': -26,
@@ -12,6 +16,20 @@ HITBOX_OFFSET = {
     'invisible': 0
 }
 
+# rendering
+CAMERA_CELL_SIZE = TILESIZE * 4
+# pre-composite static tiles into chunk surfaces instead of blitting them one by one
+STATIC_CHUNK_RENDERING = False
+STATIC_CHUNK_SIZE = 512
+PARTICLE_POOL_SIZE = 512  # cosmetic particles alive at once, extras are dropped
+
+# profiler (F3 toggles the overlay)
+# frames the overlay graph and the percentiles look back over
+PROFILER_HISTORY = 300
+PROFILER_FONT_SIZE = 14
+# a .csv or .jsonl file to write every frame's timings to; profiles from the start when set
+PROFILER_EXPORT_PATH = None
+
 # ui
 BAR_HEIGHT = 20
 HEALTH_BAR_WIDTH = 200
@@ -19,6 +37,8 @@ ENERGY_BAR_WIDTH = 140
 ITEM_BOX_SIZE = 80
 UI_FONT = get_path('../font/joystix.ttf')
 UI_FONT_SIZE = 18
+# upper bound for cached rendered text surfaces
+TEXT_CACHE_BYTES = 4 * 1024 * 1024
 
 # general colors
 WATER_COLOR = '#71ddee'
@@ -64,7 +84,58 @@ magic_data = {
     'heal': {'strength': 20, 'cost': 10, 'graphic': heal_path, 'spell_sound': heal_sound_path},
 }
 
+# maps
+# entity codes that move the player to another map when stepped on
+MAP_TRANSITIONS = {
+    # from main map to test map
+    9000: {'target_map_id': 'test', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
+    # from test map back to main map
+    9001: {'target_map_id': 'default', 'target_spawn': (27*TILESIZE, 6*TILESIZE)},
+    # from test map to island
+    9002: {'target_map_id': 'island', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
+    # from island back to test map
+    9003: {'target_map_id': 'test', 'target_spawn': (8*TILESIZE, 5*TILESIZE)},
+    # from island to island2
+    9004: {'target_map_id': 'island2', 'target_spawn': (4*TILESIZE, 4*TILESIZE)},
+}
+# a map id with a Tiled file <map_id>.tmx here is read from it instead of the CSV exports
+MAP_TMX_DIR = '../data/levels/level_data'
+# compiled maps are cached here, rebuilt whenever a source file changes
+MAP_CACHE_DIR = '../data/cache'
+# visited levels kept alive for going back, and how close (pixels) the player has
+# to get to a transition before its target map is compiled in the background
+LEVEL_CACHE_SIZE = 3
+LEVEL_PRELOAD_RADIUS = TILESIZE * 8
+
+# world streaming: only build tiles and enemies of map chunks near the camera
+WORLD_STREAMING = False
+WORLD_CHUNK_TILES = 16
+# chunks load this many pixels beyond the screen edges and unload past the second margin
+WORLD_LOAD_MARGIN = TILESIZE * 4
+WORLD_UNLOAD_MARGIN = TILESIZE * 8
+
+# saves
+# slot files are SAVE_PATH.<n>.sav; each save overwrites the oldest of SAVE_SLOTS
+SAVE_PATH = 'savegame'
+SAVE_SLOTS = 3
+# 'binary' packs the world state lists, 'json' keeps the payload readable after decompression
+SAVE_FORMAT = 'binary'
+# seconds between autosaves, which journal the changes since the last full save;
+# once the journal holds this many events the next autosave is a full save
+SAVE_AUTOSAVE_INTERVAL = 5
+SAVE_JOURNAL_COMPACT_EVENTS = 200
+
 # enemy
+# 'flow_field' shares one distance map from the player between all chasing enemies,
+# 'astar', 'jps' and 'hpa' give every enemy its own path search
+PATHFINDING_BACKEND = 'flow_field'
+# the shared flow field reaches this many tiles from the player
+FLOW_FIELD_RADIUS = 32
+# enemy AI level of detail (pixels from the player): every frame inside the first
+# radius, every AI_REDUCED_TICK_INTERVAL frames up to the second, asleep beyond it
+AI_FULL_RATE_RADIUS = 500
+AI_WAKE_RADIUS = 900
+AI_REDUCED_TICK_INTERVAL = 4
 slash_sound_path = get_path('../audio/attack/slash.wav')
 claw_sound_path = get_path('../audio/attack/claw.wav')
 fireball_sound_path = get_path('../audio/attack/fireball.wav')
@@ -0,0 +1,20 @@
+class SimulationClock:
+    """
+    Time inside the game world. It only moves when the simulation steps, by
+    the fixed step length, so cooldowns and timers run at the same pace
+    whatever the frame rate and stand still while the game is paused.
+    Menus and screens outside the world keep using real time.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def advance(self, dt):
+        self.time += dt
+
+    def get_ticks(self):
+        """Simulated milliseconds, the counterpart of pygame.time.get_ticks()."""
+        return int(self.time * 1000)
+
+
+sim_clock = SimulationClock()
@@ -0,0 +1,91 @@
+import pygame
+
+
+class SpatialHash:
+    """Uniform grid index of sprites keyed by the cells their box overlaps."""
+
+    def __init__(self, cell_size, box_attr='hitbox'):
+        self.cell_size = cell_size
+        self.box_attr = box_attr
+        self.cells = {}
+        self._sprite_cells = {}
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def add(self, sprite):
+        box = getattr(sprite, self.box_attr, None)
+        if box is None or sprite in self._sprite_cells:
+            return
+        left, top, right, bottom = self.cell_range(box)
+        keys = []
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                self.cells.setdefault((x, y), []).append(sprite)
+                keys.append((x, y))
+        self._sprite_cells[sprite] = keys
+
+    def remove(self, sprite):
+        keys = self._sprite_cells.pop(sprite, None)
+        if keys is None:
+            return
+        for key in keys:
+            bucket = self.cells[key]
+            bucket.remove(sprite)
+            if not bucket:
+                del self.cells[key]
+
+    def query(self, rect):
+        """Return the sprites whose cells overlap rect, without duplicates."""
+        left, top, right, bottom = self.cell_range(rect)
+        cells = self.cells
+        found = {}
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                bucket = cells.get((x, y))
+                if bucket:
+                    for sprite in bucket:
+                        found[sprite] = None
+        return found.keys()
+
+    def __contains__(self, sprite):
+        return sprite in self._sprite_cells
+
+    def __len__(self):
+        return len(self._sprite_cells)
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """Sprite group that keeps a SpatialHash of its members in sync."""
+
+    def __init__(self, cell_size, box_attr='hitbox'):
+        self.spatial_hash = SpatialHash(cell_size, box_attr)
+        # sprites join their groups before their hitbox exists,
+        # so new members are indexed on the next query
+        self._pending = {}
+        # bumped on every membership change so callers can cache queries
+        self.version = 0
+        super().__init__()
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._pending[sprite] = None
+        self.version += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._pending.pop(sprite, None)
+        self.spatial_hash.remove(sprite)
+        self.version += 1
+
+    def flush(self):
+        for sprite in self._pending:
+            self.spatial_hash.add(sprite)
+        self._pending.clear()
+
+    def query(self, rect):
+        if self._pending:
+            self.flush()
+        return self.spatial_hash.query(rect)
@@ -0,0 +1,149 @@
+import pygame
+from spatial_hash import SpatialGroup
+
+
+class StaticSpriteLayer:
+    """Draws static tiles one by one, culled and y-sorted per camera cell range."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.sprites = SpatialGroup(cell_size, 'rect')
+        self._cache_key = None
+        self._items_in_view = []
+
+    # the internal calls keep this index out of sprite.groups(), so
+    # sprite.kill() doesn't see its group set change while it iterates it
+    def add(self, sprite):
+        self.sprites.add_internal(sprite)
+
+    def remove(self, sprite):
+        if self.sprites.has_internal(sprite):
+            self.sprites.remove_internal(sprite)
+
+    def prepare(self):
+        self.sprites.flush()
+
+    def items_in_view(self, view_rect):
+        # the sorted list stays valid until the camera crosses a cell border
+        # or a static tile is added or removed
+        cell_range = self.sprites.spatial_hash.cell_range(view_rect)
+        cache_key = (cell_range, self.sprites.version)
+        if cache_key != self._cache_key:
+            left, top, right, bottom = cell_range
+            size = self.cell_size
+            cells_rect = pygame.Rect(
+                left * size, top * size, (right - left + 1) * size, (bottom - top + 1) * size)
+            self._items_in_view = sorted(
+                [(sprite.rect.centery, sprite.image, sprite.rect.topleft)
+                 for sprite in self.sprites.query(cells_rect)],
+                key=lambda item: item[0])
+            self._cache_key = cache_key
+        return self._items_in_view
+
+
+class StaticChunk:
+    def __init__(self):
+        self.sprites = {}
+        self.layers = []
+        self.bounds = None
+        self.dirty = True
+
+    def rebuild(self):
+        # one pre-composited surface per sort key keeps the y-sort exact:
+        # a moving sprite lands between the rows in front of and behind it
+        rows = {}
+        for sprite in self.sprites:
+            rows.setdefault(sprite.rect.centery, []).append(sprite)
+
+        self.layers = []
+        self.bounds = None
+        for y, sprites in sorted(rows.items()):
+            layer_rect = sprites[0].rect.unionall([sprite.rect for sprite in sprites[1:]])
+            surface = pygame.Surface(layer_rect.size, pygame.SRCALPHA)
+            for sprite in sprites:
+                surface.blit(sprite.image, (sprite.rect.x - layer_rect.x, sprite.rect.y - layer_rect.y))
+            self.layers.append((y, surface, layer_rect))
+            self.bounds = layer_rect.copy() if self.bounds is None else self.bounds.union(layer_rect)
+        self.dirty = False
+
+
+class StaticChunkLayer:
+    """Pre-composites static tiles into fixed-size chunks at load time.
+
+    A chunk is rebuilt lazily, the next time it is in view, after one of its
+    tiles is removed (e.g. grass being cut).
+    """
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.rebuilds = 0
+        self._pending = {}
+        self._sprite_chunks = {}
+        self._cache_key = None
+        self._items_in_view = []
+
+    def add(self, sprite):
+        self._pending[sprite] = None
+
+    def remove(self, sprite):
+        self._pending.pop(sprite, None)
+        key = self._sprite_chunks.pop(sprite, None)
+        if key is not None:
+            chunk = self.chunks[key]
+            del chunk.sprites[sprite]
+            chunk.dirty = True
+
+    def prepare(self):
+        # bake every chunk up front so the first frames don't pay for it
+        self._flush_pending()
+        for chunk in self.chunks.values():
+            if chunk.dirty:
+                chunk.rebuild()
+                self.rebuilds += 1
+
+    def _flush_pending(self):
+        for sprite in self._pending:
+            key = (sprite.rect.centerx // self.chunk_size,
+                   sprite.rect.centery // self.chunk_size)
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = self.chunks[key] = StaticChunk()
+            chunk.sprites[sprite] = None
+            chunk.dirty = True
+            self._sprite_chunks[sprite] = key
+        self._pending.clear()
+
+    def items_in_view(self, view_rect):
+        if self._pending:
+            self._flush_pending()
+
+        # tall objects can hang over their chunk border, so look one chunk further
+        size = self.chunk_size
+        left, top = view_rect.left // size - 1, view_rect.top // size - 1
+        right, bottom = (view_rect.right - 1) // size + 1, (view_rect.bottom - 1) // size + 1
+
+        chunk_keys = []
+        rebuilt = False
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                chunk = self.chunks.get((x, y))
+                if chunk is None:
+                    continue
+                if chunk.dirty:
+                    chunk.rebuild()
+                    self.rebuilds += 1
+                    rebuilt = True
+                if chunk.bounds is not None and chunk.bounds.colliderect(view_rect):
+                    chunk_keys.append((x, y))
+
+        # re-sort only when the set of chunks in view or their contents change
+        cache_key = tuple(chunk_keys)
+        if rebuilt or cache_key != self._cache_key:
+            self._items_in_view = sorted(
+                [(y, surface, layer_rect.topleft)
+                 for key in chunk_keys
+                 for y, surface, layer_rect in self.chunks[key].layers],
+                key=lambda item: item[0])
+            self._cache_key = cache_key
+        return self._items_in_view
@@ -1,7 +1,11 @@
 import os
+import random
 import pygame
 from csv import reader
 
+# random source of the game world; seed it for reproducible runs
+rng = random.Random()
+
 
 def get_path(path):
     absolute_path = os.path.dirname(__file__)
@@ -20,6 +24,20 @@ def import_csv_layout(path: str) -> list:
         return terrain_map
 
 
+def map_layer_path(map_id: str, layer: str, fallback: bool = True):
+    """
+    Path of a map's CSV layer, named map_<map_id>_<layer>.csv. Without its own
+    file a map borrows the default map's layer, or gets None if fallback is off.
+    """
+    path = f'../data/map/map_{map_id}_{layer}.csv'
+    if os.path.exists(get_path(path)):
+        return path
+    default_path = f'../data/map/map_{layer}.csv'
+    if fallback or map_id == 'default':
+        return default_path
+    return None
+
+
 def import_folder(path: str) -> list:
     unique_path = get_path(path)
     surface_list = []
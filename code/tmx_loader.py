@@ -0,0 +1,182 @@
+"""
+Reads Tiled .tmx maps straight into the layers the map compiler packs.
+
+Tile layers named like the exported CSVs (FloorBlocks, Grass, Objects,
+Entities, Floor, Details) become the matching compiled layers. Cells hold
+the tile's id inside its own tileset, which is what Tiled's CSV export
+writes, so a .tmx and its CSV export compile to the same arrays. Objects
+carrying a tile (gid) or an integer 'code' property are stamped into the
+entities layer at the cell under them, so transitions and spawns can be
+placed as objects as well as tiles.
+"""
+import base64
+import os
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+import xml.etree.ElementTree as ElementTree
+
+from support import get_path
+
+EMPTY = -1
+# the top bits of a gid store flip and rotation flags
+GID_MASK = 0x0FFFFFFF
+
+TMX_LAYERS = {
+    'FloorBlocks': 'boundary',
+    'Grass': 'grass',
+    'Objects': 'object',
+    'Entities': 'entities',
+    'Floor': 'floor',
+    'Details': 'details',
+}
+
+
+class TmxMap:
+    def __init__(self, width, height, tile_width, tile_height):
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        # (firstgid, name, tile count), ordered by firstgid
+        self.tilesets = []
+        # layer name -> flat row-major array of gids
+        self.layers = {}
+        self.objects = []
+
+    def local_ids(self, gids):
+        """Turn gids into ids inside their tileset, EMPTY for no tile."""
+        firstgids = [tileset[0] for tileset in self.tilesets] or [1]
+        codes = []
+        for gid in gids:
+            gid &= GID_MASK
+            if gid == 0:
+                codes.append(EMPTY)
+            else:
+                codes.append(gid - firstgids[max(bisect_right(firstgids, gid) - 1, 0)])
+        return codes
+
+    def game_layers(self):
+        """Compiled layer name -> rows of tile codes, every game layer filled in."""
+        width, height = self.width, self.height
+        layers = {}
+        for tmx_name, name in TMX_LAYERS.items():
+            if tmx_name in self.layers:
+                codes = self.local_ids(self.layers[tmx_name])
+            else:
+                codes = [EMPTY] * (width * height)
+            layers[name] = codes
+
+        for obj in self.objects:
+            if obj['gid']:
+                code = self.local_ids([obj['gid']])[0]
+                # tile objects are anchored at their bottom-left corner
+                y = obj['y'] - obj['height']
+            elif 'code' in obj['properties']:
+                code = int(obj['properties']['code'])
+                y = obj['y']
+            else:
+                continue
+            col = int(obj['x'] // self.tile_width)
+            row = int(y // self.tile_height)
+            if 0 <= col < width and 0 <= row < height:
+                layers['entities'][row * width + col] = code
+
+        return {name: [codes[row * width:(row + 1) * width] for row in range(height)]
+                for name, codes in layers.items()}
+
+
+def decode_layer_data(data, size):
+    """The gids of a <data> element as an array of unsigned ints."""
+    encoding = data.get('encoding')
+    text = (data.text or '').strip()
+    if encoding == 'csv':
+        gids = array('I', map(int, text.replace('\n', '').split(',')))
+    elif encoding == 'base64':
+        raw = base64.b64decode(text)
+        compression = data.get('compression')
+        if compression in ('zlib', 'gzip'):
+            # wbits 47 accepts both zlib and gzip headers
+            raw = zlib.decompress(raw, 47)
+        elif compression:
+            raise ValueError(f'unsupported TMX layer compression {compression!r}')
+        gids = array('I')
+        gids.frombytes(raw)
+        if sys.byteorder == 'big':
+            gids.byteswap()
+    elif encoding is None:
+        gids = array('I', (int(tile.get('gid', 0)) for tile in data.iter('tile')))
+    else:
+        raise ValueError(f'unsupported TMX layer encoding {encoding!r}')
+
+    if len(gids) != size:
+        raise ValueError(f'TMX layer has {len(gids)} tiles, expected {size}')
+    return gids
+
+
+def read_tileset(element, directory):
+    firstgid = int(element.get('firstgid'))
+    source = element.get('source')
+    if source is not None:
+        # external .tsx; only its name and size are needed
+        path = os.path.join(directory, source)
+        if os.path.exists(path):
+            element = ElementTree.parse(path).getroot()
+        else:
+            return (firstgid, os.path.splitext(os.path.basename(source))[0], 0)
+    return (firstgid, element.get('name'), int(element.get('tilecount', 0)))
+
+
+def read_properties(element):
+    properties = element.find('properties')
+    if properties is None:
+        return {}
+    return {prop.get('name'): prop.get('value', prop.text) for prop in properties.iter('property')}
+
+
+def load_tmx(path):
+    """
+    Parse a .tmx file. Layers are decoded one at a time as the parser reaches
+    them and dropped from the element tree afterwards.
+    """
+    full_path = get_path(path)
+    directory = os.path.dirname(full_path)
+    tmx = None
+    # open elements, so tile collision shapes inside tilesets are not read as map objects
+    stack = []
+
+    for event, element in ElementTree.iterparse(full_path, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element.tag)
+            if element.tag == 'map':
+                if element.get('infinite') == '1':
+                    raise ValueError(f'{path}: infinite TMX maps are not supported')
+                tmx = TmxMap(int(element.get('width')), int(element.get('height')),
+                             int(element.get('tilewidth')), int(element.get('tileheight')))
+            continue
+
+        stack.pop()
+        if element.tag == 'tileset':
+            tmx.tilesets.append(read_tileset(element, directory))
+            element.clear()
+        elif element.tag == 'layer':
+            data = element.find('data')
+            tmx.layers[element.get('name')] = decode_layer_data(data, tmx.width * tmx.height)
+            element.clear()
+        elif element.tag == 'object' and 'tileset' not in stack:
+            tmx.objects.append({
+                'name': element.get('name', ''),
+                'type': element.get('type', element.get('class', '')),
+                'gid': int(element.get('gid', 0)),
+                'x': float(element.get('x', 0)),
+                'y': float(element.get('y', 0)),
+                'width': float(element.get('width', 0)),
+                'height': float(element.get('height', 0)),
+                'properties': read_properties(element),
+            })
+        elif element.tag == 'objectgroup':
+            element.clear()
+
+    tmx.tilesets.sort()
+    return tmx
@@ -1,4 +1,7 @@
 import pygame
+import time
+from collections import deque
+from assets import assets, text_cache
 from settings import UI_FONT, UI_FONT_SIZE, HEALTH_BAR_WIDTH, BAR_HEIGHT, ENERGY_BAR_WIDTH, weapon_data, magic_data, UI_BG_COLOR, UI_BORDER_COLOR, TEXT_COLOR, UI_BORDER_COLOR_ACTIVE, HEALTH_COLOR, ENERGY_COLOR, ITEM_BOX_SIZE
 
 
@@ -6,7 +9,7 @@ class UI:
     def __init__(self):
         # general
         self.display_surface = pygame.display.get_surface()
-        self.font = pygame.font.Font(UI_FONT, UI_FONT_SIZE)
+        self.font = assets.font(UI_FONT, UI_FONT_SIZE)
 
         # bar setup
         self.health_bar_rect = pygame.Rect(
@@ -14,24 +17,41 @@ class UI:
         self.energy_bar_rect = pygame.Rect(
             10, 34, ENERGY_BAR_WIDTH, BAR_HEIGHT)
 
-        # TODO refactor next 2 loops to 1 function for reusability
-        # convert weapon dictionary
-        self.weapon_graphics = []
-        for weapon in weapon_data.values():
-            path = weapon['graphic']
-            weapon = pygame.image.load(path).convert_alpha()
-            self.weapon_graphics.append(weapon)
-
-        # convert magic dictionary
-        self.magic_graphics = []
-        for magic in magic_data.values():
-            path = magic['graphic']
-            magic = pygame.image.load(path).convert_alpha()
-            self.magic_graphics.append(magic)
-
-    def show_bar(self, current, max_amount, bg_rect, color):
+        # item icons, shared with the asset cache
+        self.weapon_graphics = [assets.image(weapon['graphic']) for weapon in weapon_data.values()]
+        self.magic_graphics = [assets.image(magic['graphic']) for magic in magic_data.values()]
+
+        # every HUD widget is drawn onto its own small surface, only when
+        # what it shows changes; name -> (surface, screen rect)
+        self.widgets = {}
+        self.widget_states = {}
+        self.rebuilds = 0
+        # times of the rebuilds in the last second
+        self.rebuild_times = deque()
+
+    def prune_rebuild_times(self, now):
+        while self.rebuild_times and now - self.rebuild_times[0] > 1:
+            self.rebuild_times.popleft()
+
+    @property
+    def rebuilds_per_second(self):
+        self.prune_rebuild_times(time.perf_counter())
+        return len(self.rebuild_times)
+
+    def widget_surface(self, name, screen_rect):
+        """The surface of widget name, placed at screen_rect; reused while its size stays the same."""
+        surface = self.widgets.get(name, (None, None))[0]
+        if surface is None or surface.get_size() != screen_rect.size:
+            surface = pygame.Surface(screen_rect.size).convert()
+        self.widgets[name] = (surface, screen_rect)
+        return surface
+
+    def show_bar(self, name, current, max_amount, screen_rect, color):
+        surface = self.widget_surface(name, screen_rect)
+        bg_rect = surface.get_rect()
+
         # draw bg
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+        pygame.draw.rect(surface, UI_BG_COLOR, bg_rect)
 
         # converting stat to pixel
         ratio = current / max_amount
@@ -40,55 +60,83 @@ class UI:
         current_rect.width = current_width
 
         # drawing the bar
-        pygame.draw.rect(self.display_surface, color, current_rect)
-        pygame.draw.rect(self.display_surface,
+        pygame.draw.rect(surface, color, current_rect)
+        pygame.draw.rect(surface,
                          UI_BORDER_COLOR, bg_rect, 3)
 
     def show_exp(self, exp):
-        text_surf = self.font.render(str(int(exp)), False, TEXT_COLOR)
+        text_surf = text_cache.render(self.font, str(int(exp)), TEXT_COLOR)
         x = self.display_surface.get_size()[0] - 20
         y = self.display_surface.get_size()[1] - 20
         text_rect = text_surf.get_rect(bottomright=(x, y))
 
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR,
-                         text_rect.inflate(20, 20))
-        self.display_surface.blit(text_surf, text_rect)
-        pygame.draw.rect(self.display_surface, UI_BORDER_COLOR,
-                         text_rect.inflate(20, 20), 3)
+        surface = self.widget_surface('exp', text_rect.inflate(20, 20))
+        bg_rect = surface.get_rect()
+        pygame.draw.rect(surface, UI_BG_COLOR, bg_rect)
+        surface.blit(text_surf, text_surf.get_rect(center=bg_rect.center))
+        pygame.draw.rect(surface, UI_BORDER_COLOR, bg_rect, 3)
 
-    def selection_box(self, left, top, has_switched):
-        bg_rect = pygame.Rect(left, top, ITEM_BOX_SIZE, ITEM_BOX_SIZE)
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+    def selection_box(self, name, left, top, has_switched):
+        surface = self.widget_surface(name, pygame.Rect(left, top, ITEM_BOX_SIZE, ITEM_BOX_SIZE))
+        bg_rect = surface.get_rect()
+        pygame.draw.rect(surface, UI_BG_COLOR, bg_rect)
 
         if has_switched:
-            pygame.draw.rect(self.display_surface,
+            pygame.draw.rect(surface,
                              UI_BORDER_COLOR_ACTIVE, bg_rect, 3)
         else:
-            pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, bg_rect, 3)
-        return bg_rect
+            pygame.draw.rect(surface, UI_BORDER_COLOR, bg_rect, 3)
+        return surface, bg_rect
 
     # TODO refactor next 2 overlays to 1 function for reusability
     def weapon_overlay(self, weapon_index, has_switched):
-        bg_rect = self.selection_box(10, 630, has_switched)
+        surface, bg_rect = self.selection_box('weapon', 10, 630, has_switched)
         weapon_surf = self.weapon_graphics[weapon_index]
         weapon_rect = weapon_surf.get_rect(center=bg_rect.center)
 
-        self.display_surface.blit(weapon_surf, weapon_rect)
+        surface.blit(weapon_surf, weapon_rect)
 
     def magic_overlay(self, magic_index, has_switched):
-        bg_rect = self.selection_box(80, 635, has_switched)
+        surface, bg_rect = self.selection_box('magic', 80, 635, has_switched)
         magic_surf = self.magic_graphics[magic_index]
         magic_rect = magic_surf.get_rect(center=bg_rect.center)
 
-        self.display_surface.blit(magic_surf, magic_rect)
-
-    def display(self, player):
-        self.show_bar(
-            player.health, player.stats['health'], self.health_bar_rect, HEALTH_COLOR)
-        self.show_bar(
-            player.energy, player.stats['energy'], self.energy_bar_rect, ENERGY_COLOR)
+        surface.blit(magic_surf, magic_rect)
 
-        self.show_exp(player.exp)
+    def bar_width(self, current, max_amount, bg_rect):
+        return int(bg_rect.width * current / max_amount)
 
-        self.weapon_overlay(player.weapon_index, not player.can_switch_weapon)
-        self.magic_overlay(player.magic_index, not player.can_switch_magic)
+    def display(self, player):
+        # what each widget shows, at the resolution it is drawn with
+        states = {
+            'health': self.bar_width(player.health, player.stats['health'], self.health_bar_rect),
+            'energy': self.bar_width(player.energy, player.stats['energy'], self.energy_bar_rect),
+            'exp': int(player.exp),
+            'weapon': (player.weapon_index, not player.can_switch_weapon),
+            'magic': (player.magic_index, not player.can_switch_magic),
+        }
+        changed = [name for name, state in states.items() if self.widget_states.get(name) != state]
+        if changed:
+            self.widget_states = states
+            self.rebuild(player, changed)
+        self.display_surface.blits(list(self.widgets.values()), doreturn=False)
+
+    def rebuild(self, player, names):
+        """Redraw the widgets in names."""
+        self.rebuilds += 1
+        now = time.perf_counter()
+        self.prune_rebuild_times(now)
+        self.rebuild_times.append(now)
+
+        if 'health' in names:
+            self.show_bar('health',
+                          player.health, player.stats['health'], self.health_bar_rect, HEALTH_COLOR)
+        if 'energy' in names:
+            self.show_bar('energy',
+                          player.energy, player.stats['energy'], self.energy_bar_rect, ENERGY_COLOR)
+        if 'exp' in names:
+            self.show_exp(player.exp)
+        if 'weapon' in names:
+            self.weapon_overlay(player.weapon_index, not player.can_switch_weapon)
+        if 'magic' in names:
+            self.magic_overlay(player.magic_index, not player.can_switch_magic)
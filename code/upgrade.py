@@ -1,4 +1,6 @@
 import pygame
+from assets import assets, text_cache
+from save_manager import record_event
 from settings import UI_FONT, UI_FONT_SIZE, TEXT_COLOR_SELECTED, TEXT_COLOR, BAR_COLOR_SELECTED, BAR_COLOR, UPGRADE_BG_COLOR_SELECTED, UI_BG_COLOR, UI_BORDER_COLOR
 
 
@@ -10,7 +12,7 @@ class Upgrade:
         self.attributes_len = len(player.stats)
         self.attributes_names = list(player.stats.keys())
         self.max_values = list(player.max_stats.values())
-        self.font = pygame.font.Font(UI_FONT, UI_FONT_SIZE)
+        self.font = assets.font(UI_FONT, UI_FONT_SIZE)
 
         # item creation
         self.width = self.display_surface.get_size()[
@@ -38,7 +40,10 @@ class Upgrade:
             if keys[pygame.K_SPACE]:
                 self.can_move = False
                 self.selection_time = pygame.time.get_ticks()
-                self.items[self.selection_index].trigger(self.player)
+                attribute = self.items[self.selection_index].trigger(self.player)
+                if attribute is not None:
+                    record_event({'type': 'upgrade', 'stat': attribute, 'value': self.player.stats[attribute],
+                                  'cost': self.player.upgrade_cost[attribute], 'exp': self.player.exp})
 
     def selection_cooldown(self):
         if not self.can_move and self.selection_time is not None:
@@ -85,12 +90,12 @@ class Item:
         color = TEXT_COLOR_SELECTED if selected else TEXT_COLOR
 
         # title
-        title_surf = self.font.render(name, False, color)
+        title_surf = text_cache.render(self.font, name, color)
         title_rect = title_surf.get_rect(
             midtop=self.rect.midtop + pygame.math.Vector2(0, 20))
 
         # cost
-        cost_surf = self.font.render(f'{int(cost)}', False, color)
+        cost_surf = text_cache.render(self.font, f'{int(cost)}', color)
         cost_rect = cost_surf.get_rect(
             midbottom=self.rect.midbottom - pygame.math.Vector2(0, 20))
 
@@ -115,13 +120,17 @@ class Item:
 
     def trigger(self, player):
         upgrade_attribute = list(player.stats.keys())[self.index]
+        upgraded = False
         if player.exp >= player.upgrade_cost[upgrade_attribute] and player.stats[upgrade_attribute] < player.max_stats[upgrade_attribute]:
             player.exp -= player.upgrade_cost[upgrade_attribute]
             player.stats[upgrade_attribute] *= 1.2
             player.upgrade_cost[upgrade_attribute] *= 1.4
+            upgraded = True
 
         if player.stats[upgrade_attribute] > player.max_stats[upgrade_attribute]:
             player.stats[upgrade_attribute] = player.max_stats[upgrade_attribute]
+        # the upgraded attribute, None if the player could not afford it
+        return upgrade_attribute if upgraded else None
 
     def display(self, surface, selection_num, name, value, max_value, cost):
         if self.index == selection_num:
@@ -1,5 +1,5 @@
 import pygame
-from support import get_path
+from assets import assets, weapon_image_path
 
 
 class Weapon(pygame.sprite.Sprite):
@@ -9,9 +9,7 @@ class Weapon(pygame.sprite.Sprite):
         direction = player.status.split('_')[0]  # cut '_idle'
 
         # graphic
-        full_path = get_path(
-            f'../graphics/weapons/{player.weapon}/{direction}.png')
-        self.image = pygame.image.load(full_path).convert_alpha()
+        self.image = assets.image(weapon_image_path(player.weapon, direction))
 
         # placement
         if direction == 'right':
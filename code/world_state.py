@@ -0,0 +1,57 @@
+from settings import TILESIZE
+
+# kinds of map content the player can remove for good
+GRASS = 'grass'
+ENEMY = 'enemy'
+
+SAVE_KEYS = {GRASS: 'destroyed_grass', ENEMY: 'defeated_enemies'}
+
+
+class WorldState:
+    """
+    Everything the player has removed from the world, on every visited map:
+    cut grass by its tile and defeated enemies by their spawn tile, stored as
+    (map_id, col, row) in one set per kind. Levels record kills here as they
+    happen and consult it when they build their sprites.
+    """
+
+    def __init__(self):
+        self.removed = {GRASS: set(), ENEMY: set()}
+        # called with (kind, map_id, pos) for everything newly removed
+        self.on_remove = None
+
+    @staticmethod
+    def key(map_id, pos):
+        return (map_id, int(pos[0] // TILESIZE), int(pos[1] // TILESIZE))
+
+    def remove(self, kind, map_id, pos):
+        """Record that the kind of content at pixel pos on map_id is gone."""
+        key = self.key(map_id, pos)
+        if key in self.removed[kind]:
+            return
+        self.removed[kind].add(key)
+        if self.on_remove is not None:
+            self.on_remove(kind, map_id, pos)
+
+    def is_removed(self, kind, map_id, pos):
+        return self.key(map_id, pos) in self.removed[kind]
+
+    def removed_cells(self, kind, map_id):
+        """(col, row) of everything of that kind removed from map_id."""
+        return {(col, row) for removed_map, col, row in self.removed[kind] if removed_map == map_id}
+
+    def to_dict(self):
+        return {
+            SAVE_KEYS[kind]: [{'map_id': map_id, 'x': col * TILESIZE, 'y': row * TILESIZE}
+                              for map_id, col, row in sorted(keys)]
+            for kind, keys in self.removed.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore from a save; entries of older saves without a map_id belong to the default map."""
+        state = cls()
+        for kind, save_key in SAVE_KEYS.items():
+            for entry in data.get(save_key, ()):
+                state.remove(kind, entry.get('map_id', 'default'), (entry['x'], entry['y']))
+        return state
@@ -0,0 +1,154 @@
+import pygame
+from map_compiler import EMPTY, PLAYER_CODE
+
+STREAMED_LAYERS = ('boundary', 'grass', 'object')
+
+
+class WorldStreamer:
+    """
+    Builds the tile sprites and enemies of a compiled map one chunk at a time.
+    Chunks within load_margin pixels of the view are materialized, chunks
+    further than unload_margin are evicted again. What happened to a chunk
+    while it was loaded survives eviction: cut grass and killed enemies stay
+    gone (is_removed(kind, pos) answers that from the world state), and
+    enemies that were only evicted come back where they left, with their
+    health. An enemy belongs to the chunk it is in rather than the one it
+    spawned in, so it always has that chunk's obstacles around it and is
+    evicted along with it.
+    """
+
+    def __init__(self, compiled_map, tile_size, chunk_tiles, view_size, load_margin, unload_margin,
+                 create_tile, create_enemy, is_removed):
+        self.map = compiled_map
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.chunk_pixels = chunk_tiles * tile_size
+        self.view_size = view_size
+        self.load_margin = load_margin
+        self.unload_margin = unload_margin
+        self.create_tile = create_tile
+        self.create_enemy = create_enemy
+        self.is_removed = is_removed
+
+        # enemy spawns by chunk; the player is placed by the level
+        self.spawns = {}
+        self.spawn_codes = {}
+        for col, row, code in compiled_map.spawns:
+            if code != PLAYER_CODE:
+                chunk = (col // chunk_tiles, row // chunk_tiles)
+                self.spawns.setdefault(chunk, []).append((col, row, code))
+                self.spawn_codes[('enemy', col * tile_size, row * tile_size)] = code
+
+        # chunk -> [(key, sprite)], key being (kind, x, y) of the map cell,
+        # the spawn cell for enemies
+        self.loaded = {}
+        # enemy key -> (chunk it is filed under, enemy) of the loaded enemies
+        self.enemies = {}
+        # chunk -> {enemy key: (health, pos)} of evicted enemies that were still alive
+        self.evicted = {}
+        # keys in evicted, so their spawn chunk doesn't bring them back a second time
+        self.evicted_keys = set()
+
+        self.loads = 0
+        self.evictions = 0
+
+    def chunks_around(self, center, margin):
+        width, height = self.view_size
+        area = pygame.Rect(0, 0, width + margin * 2, height + margin * 2)
+        area.center = center
+        size = self.chunk_pixels
+        max_x = -(-self.map.width // self.chunk_tiles) - 1
+        max_y = -(-self.map.height // self.chunk_tiles) - 1
+        left, right = max(area.left // size, 0), min(area.right // size, max_x)
+        top, bottom = max(area.top // size, 0), min(area.bottom // size, max_y)
+        return {(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)}
+
+    def chunk_at(self, pos):
+        size = self.chunk_pixels
+        return (int(pos[0] // size), int(pos[1] // size))
+
+    def update(self, center):
+        """Load and evict chunks for a view centered on center."""
+        for chunk in self.chunks_around(center, self.load_margin):
+            if chunk not in self.loaded:
+                self.load(chunk)
+
+        keep = self.chunks_around(center, self.unload_margin)
+        for chunk in [chunk for chunk in self.loaded if chunk not in keep]:
+            self.unload(chunk, keep)
+
+        # enemies that walked into another chunk since the last update
+        for key, (chunk, enemy) in list(self.enemies.items()):
+            if not enemy.alive():
+                del self.enemies[key]
+            elif self.chunk_at(enemy.hitbox.center) != chunk:
+                self.loaded[chunk].remove((key, enemy))
+                self.refile(key, enemy, keep)
+
+    def load(self, chunk):
+        tiles, size = self.chunk_tiles, self.tile_size
+        width = self.map.width
+        left, top = chunk[0] * tiles, chunk[1] * tiles
+        right, bottom = min(left + tiles, width), min(top + tiles, self.map.height)
+
+        sprites = []
+        for layer in STREAMED_LAYERS:
+            cells = self.map.layers[layer]
+            for row in range(top, bottom):
+                start = row * width
+                for col, code in enumerate(cells[start + left:start + right], left):
+                    if code == EMPTY:
+                        continue
+                    key = (layer, col * size, row * size)
+                    if layer != 'grass' or not self.is_removed(layer, key[1:]):
+                        sprites.append((key, self.create_tile(layer, key[1], key[2], code)))
+
+        for col, row, code in self.spawns.get(chunk, ()):
+            key = ('enemy', col * size, row * size)
+            if key in self.enemies or key in self.evicted_keys or self.is_removed('enemy', key[1:]):
+                continue
+            enemy = self.create_enemy(code, key[1], key[2])
+            sprites.append((key, enemy))
+            self.enemies[key] = (chunk, enemy)
+
+        for key, (health, pos) in self.evicted.pop(chunk, {}).items():
+            self.evicted_keys.discard(key)
+            enemy = self.create_enemy(self.spawn_codes[key], key[1], key[2])
+            enemy.health = health
+            enemy.pos.update(pos)
+            enemy.hitbox.center = round(enemy.pos.x), round(enemy.pos.y)
+            enemy.rect.center = enemy.hitbox.center
+            sprites.append((key, enemy))
+            self.enemies[key] = (chunk, enemy)
+
+        self.loaded[chunk] = sprites
+        self.loads += 1
+
+    def unload(self, chunk, keep=()):
+        """Evict chunk. Its enemies that are now in a chunk of keep move over to that chunk."""
+        for key, sprite in self.loaded.pop(chunk):
+            if not sprite.alive():
+                # cut or killed, already in the world state
+                self.enemies.pop(key, None)
+            elif key in self.enemies:
+                self.refile(key, sprite, keep)
+            else:
+                sprite.kill()
+        self.evictions += 1
+
+    def refile(self, key, enemy, keep):
+        """
+        File a live enemy under the chunk it is in, loading that chunk if it
+        is within keep and evicting the enemy there if it is not.
+        """
+        chunk = self.chunk_at(enemy.hitbox.center)
+        if chunk in keep:
+            if chunk not in self.loaded:
+                self.load(chunk)
+            self.loaded[chunk].append((key, enemy))
+            self.enemies[key] = (chunk, enemy)
+            return
+        del self.enemies[key]
+        self.evicted.setdefault(chunk, {})[key] = (enemy.health, tuple(enemy.pos))
+        self.evicted_keys.add(key)
+        enemy.kill()